@@ -28,7 +28,7 @@ with col1:
     st.write(
         "- สร้างหน้า HTML ต่อครุภัณฑ์จาก Excel\n"
         "- ทำ QR ให้สแกนไปหน้าออนไลน์\n"
-        "- มี Dashboard ค้นหา/พรีวิว/ดาวน์โหลด PNG และรวม PDF 3×8"
+        "- มี Dashboard ค้นหา/พรีวิว/ดาวน์โหลด PNG และรวม PDF (A4 3×8, Avery, thermal)"
     )
     if is_authed():
         st.success("คุณได้เข้าสู่ระบบแล้ว ✅")
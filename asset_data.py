@@ -0,0 +1,276 @@
+# asset_data.py
+"""
+Shared loader for Smart Asset Lab.xlsx used by build_pages_and_qr.py and the dashboard.
+
+The workbook is parsed once and written to a columnar cache (Parquet when pyarrow
+is installed, pickle otherwise) under SmartAsset_QR_Pages/.cache/, keyed by the
+file's path, its content hash and CACHE_FORMAT. The asset ID and slug of every
+row are resolved at the same time, so callers never re-run pick_id/slugify per row.
+
+For several sheets / workbooks (one sheet per department), iter_chunks streams
+rows with openpyxl in read-only mode and yields AssetData chunks of at most
+CHUNK_ROWS rows, tagged with their source in SOURCE_COL; slugs stay unique
+across all chunks, so memory does not grow with the size of the inventory.
+"""
+import re, json, hashlib
+from collections import namedtuple
+from pathlib import Path
+import pandas as pd
+
+EXCEL_PATH = "Smart Asset Lab.xlsx"
+CACHE_DIR = Path("SmartAsset_QR_Pages") / ".cache"
+# รุ่นของ cache — เพิ่มเลขเมื่อแก้ ID_PRIORITY, slugify/กฎกันชื่อซ้ำ หรือรูปแบบไฟล์ cache
+# (cache เก็บ ID/slug ที่คำนวณแล้ว ถ้าไม่เปลี่ยนเลขจะได้ชื่อไฟล์หน้า/QR ตามกฎเก่าจนกว่า Excel จะเปลี่ยน)
+CACHE_FORMAT = 2
+
+# ให้ "รหัสเครื่องมือห้องปฏิบัติการ" มาก่อน จากนั้นจึง AssetID
+ID_PRIORITY = ["รหัสเครื่องมือห้องปฏิบัติการ","AssetID","รหัส","รหัสครุภัณฑ์","Code","ID","Asset Id","Asset_ID"]
+
+_ID_COL, _SLUG_COL = "__asset_id", "__slug"
+
+SOURCE_COL = "แผ่นงาน"  # "<ชื่อไฟล์>/<ชื่อแผ่น>" ของแต่ละแถวเมื่ออ่านหลายแหล่ง
+CHUNK_ROWS = 2000
+WORKBOOK_EXTS = (".xlsx", ".xlsm")
+
+# df: ข้อมูลแผ่นแรก (ไม่มีแถวว่าง), ids/slugs: Series ตาม df.index, version: hash ของไฟล์ (None ใน chunk)
+AssetData = namedtuple("AssetData", "df ids slugs version")
+
+# --- ID / slug -------------------------------------------------------------
+def pick_id(row):
+    for k in ID_PRIORITY:
+        if k in row.index and pd.notna(row[k]) and str(row[k]).strip():
+            return str(row[k]).strip()
+    return f"ROW-{int(row.name)+1}"
+
+def slugify(s):
+    s = str(s or "").strip()
+    s = re.sub(r"[^\w\-]+", "-", s, flags=re.UNICODE)  # เว้นวรรค/อักขระพิเศษ -> -
+    s = re.sub(r"-+", "-", s).strip("-")               # ลด -- ให้เหลือ -
+    return s or "item"
+
+def claim_slugs(slugs, used):
+    """กันชื่อไฟล์ชนกับ used (ถูกเพิ่มในที่ — ใช้ต่อเนื่องข้ามหลาย chunk ได้) คืน list ของ slug"""
+    out = []
+    for orig in slugs:
+        slug, n = orig, 2
+        while slug in used:
+            slug = f"{orig}-{n}"
+            n += 1
+        used.add(slug); out.append(slug)
+    return out
+
+def unique_slugs(ids):
+    """slugify ทุก ID แล้วกันชื่อไฟล์ชน (LAB-001 ซ้ำ → LAB-001-2, LAB-001-3, ...)"""
+    return claim_slugs(map(slugify, ids), set())
+
+def pick_ids(df):
+    """pick_id ทั้งตาราง: ไล่คอลัมน์ตาม ID_PRIORITY ทีละคอลัมน์ ค่าแรกที่ไม่ว่างชนะ"""
+    ids = pd.Series(pd.NA, index=df.index, dtype=object)
+    for k in ID_PRIORITY:
+        if k not in df.columns:
+            continue
+        col = df[k]
+        text = col.astype(str).str.strip()
+        ok = col.notna() & (text != "") & ids.isna()
+        ids[ok] = text[ok]
+    missing = ids.isna()
+    ids[missing] = [f"ROW-{int(i)+1}" for i in df.index[missing]]
+    return ids
+
+def slugify_all(ids):
+    """slugify แบบ vectorized (.str) — ผลเหมือน slugify ทีละค่า"""
+    # คงเป็น object: dtype str ของ pandas ใหม่ใช้ regex ของ Arrow ซึ่ง \w ไม่รวมอักษรไทย
+    s = pd.Series(ids, dtype=object).fillna("").map(str).astype(object).str.strip()
+    # [^\w\-]+ → - แล้วยุบ -+ เท่ากับแทน \W+ (ช่วงที่ไม่ใช่ตัวอักษร รวม -) ด้วย - ครั้งเดียว
+    s = s.str.replace(r"\W+", "-", regex=True).str.strip("-")
+    return s.mask(s == "", "item")
+
+def dedupe_slugs(slugs):
+    """เติม -2, -3, ... ให้ slug ที่ซ้ำ ด้วย groupby.cumcount รอบเดียว
+    ถ้าชื่อที่เติมแล้วไปชนกับ slug อื่น (เช่นมี LAB-001-2 อยู่แล้วใน Excel) ใช้ unique_slugs ทีละแถวแทน
+    """
+    n = slugs.groupby(slugs, sort=False).cumcount()
+    out = slugs.where(n == 0, slugs + "-" + (n + 1).astype(str))
+    if out.is_unique:
+        return out
+    return pd.Series(claim_slugs(slugs, set()), index=slugs.index, dtype=object)
+
+def resolve_ids(df):
+    """คืน (ids, slugs) เป็น Series ตาม df.index"""
+    ids = pick_ids(df)
+    slugs = dedupe_slugs(slugify_all(ids))
+    return ids, slugs.astype(object)
+
+# --- cache -----------------------------------------------------------------
+def file_digest(path, cache_dir=CACHE_DIR) -> str:
+    """sha256 ของไฟล์ (16 ตัวแรก) — จำไว้คู่กับ mtime/size จะได้ไม่ต้องอ่านทั้งไฟล์ทุกครั้ง"""
+    path = Path(path); st = path.stat()
+    meta_path = Path(cache_dir) / "digests.json"
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        meta = {}
+    key = str(path.resolve())
+    hit = meta.get(key)
+    if hit and hit["mtime_ns"] == st.st_mtime_ns and hit["size"] == st.st_size:
+        return hit["sha256"]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    meta[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest}
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=1), encoding="utf-8")
+    return digest
+
+def read_sheet(path=EXCEL_PATH):
+    """อ่านแผ่นแรกจาก Excel ตรง ๆ (ไม่ผ่าน cache)"""
+    xl = pd.ExcelFile(path)
+    return xl.parse(xl.sheet_names[0]).dropna(how="all").reset_index(drop=True)
+
+def _write_cache(df, stem):
+    try:
+        df.to_parquet(f"{stem}.parquet", index=False)
+        return
+    except Exception:  # ไม่มี pyarrow หรือคอลัมน์ชนิดผสมที่ Parquet รับไม่ได้
+        Path(f"{stem}.parquet").unlink(missing_ok=True)
+    df.to_pickle(f"{stem}.pkl")
+
+def _read_cache(stem):
+    if Path(f"{stem}.parquet").exists():
+        return pd.read_parquet(f"{stem}.parquet")
+    if Path(f"{stem}.pkl").exists():
+        return pd.read_pickle(f"{stem}.pkl")
+    return None
+
+def load_assets(path=EXCEL_PATH, cache_dir=CACHE_DIR) -> AssetData:
+    """โหลดข้อมูลทรัพย์สินพร้อม ID/slug — แปลง Excel ครั้งเดียวต่อเวอร์ชันไฟล์"""
+    path = Path(path); cache_dir = Path(cache_dir)
+    version = file_digest(path, cache_dir)
+    # ชื่อไฟล์ + hash ของ path เต็ม: ไฟล์ชื่อเดียวกันคนละโฟลเดอร์ไม่ลบ cache ของกันและกัน
+    name = slugify(path.stem)
+    prefix = f"{name}-{hashlib.sha256(str(path.resolve()).encode('utf-8')).hexdigest()[:8]}"
+    stem = (cache_dir / f"{prefix}-v{CACHE_FORMAT}-{version}").as_posix()
+
+    try:
+        cached = _read_cache(stem)
+    except Exception:  # ไฟล์ cache เสีย → อ่าน Excel ใหม่
+        cached = None
+    if cached is None:
+        df = read_sheet(path)
+        ids, slugs = resolve_ids(df)
+        cached = df.assign(**{_ID_COL: ids, _SLUG_COL: slugs})
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # เวอร์ชัน/รุ่น cache เก่าของไฟล์เดียวกัน และชื่อแบบเดิม "<ชื่อ>-<hash>" ที่ไม่มี path/รุ่น
+        stale = re.compile(f"(?:{re.escape(prefix)}-v\\d+|{re.escape(name)})" + r"-[0-9a-f]{16}\.(parquet|pkl)")
+        for old in cache_dir.iterdir():
+            if stale.fullmatch(old.name): old.unlink(missing_ok=True)
+        _write_cache(cached, stem)
+
+    ids = cached.pop(_ID_COL).astype(object)
+    slugs = cached.pop(_SLUG_COL).astype(object)
+    return AssetData(cached, ids, slugs, version)
+
+# --- หลายแผ่นงาน / หลายไฟล์ (stream) ----------------------------------------
+def find_sources(inputs, all_sheets=False):
+    """[(path, ชื่อแผ่น)] จากไฟล์หรือโฟลเดอร์ (ทุก .xlsx/.xlsm ข้างใน เรียงตามชื่อ)
+    all_sheets=False อ่านเฉพาะแผ่นแรกของแต่ละไฟล์ — ระบุไฟล์ที่ไม่ใช่ .xlsx/.xlsm ตรง ๆ โยน ValueError
+    """
+    from openpyxl import load_workbook
+    out = []
+    for p in map(Path, inputs):
+        if p.is_dir():
+            files = sorted(f for f in p.iterdir()
+                           if f.suffix.lower() in WORKBOOK_EXTS and not f.name.startswith("~$"))
+        elif p.suffix.lower() not in WORKBOOK_EXTS:
+            raise ValueError(f"{p} ไม่ใช่ไฟล์ Excel ที่รองรับ ({', '.join(WORKBOOK_EXTS)})")
+        else:
+            files = [p]
+        for f in files:
+            wb = load_workbook(f, read_only=True)
+            try:
+                names = wb.sheetnames if all_sheets else wb.sheetnames[:1]
+            finally:
+                wb.close()
+            out += [(f, name) for name in names]
+    return out
+
+def _header_names(header):
+    """ชื่อคอลัมน์แบบเดียวกับ pandas: หัวว่าง → "Unnamed: i", ชื่อซ้ำ → "ชื่อ.1", "ชื่อ.2" ..."""
+    names, seen = [], {}
+    for i, h in enumerate(header):
+        name = f"Unnamed: {i}" if h is None else (h if isinstance(h, str) else str(h))
+        k = seen.get(name, 0); seen[name] = k + 1
+        names.append(f"{name}.{k}" if k else name)
+    return names
+
+def iter_sheet_rows(path, sheet):
+    """yield รายชื่อคอลัมน์ (ครั้งแรก) แล้วตามด้วยแถวข้อมูลทีละแถว (tuple) — ข้ามแถวที่ว่างทั้งแถว
+    คอลัมน์ท้ายที่ไม่มีหัวตัดทิ้ง (openpyxl มักรายงานคอลัมน์ว่างเกินมา)
+    """
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import ERROR_CODES
+    blank = {"", *ERROR_CODES}  # ข้อความว่างและค่า error ของสูตร (#NAME? ...) เป็นค่าว่างเหมือน read_excel
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        width = max((i + 1 for i, h in enumerate(header) if h is not None), default=0)
+        if not width:
+            return
+        yield _header_names(header[:width])
+        for row in rows:
+            row = tuple(None if isinstance(v, str) and v in blank else v for v in row[:width]) \
+                  + (None,) * (width - len(row))
+            if any(v is not None for v in row):
+                yield row
+    finally:
+        wb.close()
+
+def _chunk_data(rows, columns, start, used, source):
+    df = pd.DataFrame(rows, columns=columns, dtype=object,
+                      index=pd.RangeIndex(start, start + len(rows)))
+    if source is not None:
+        df[SOURCE_COL] = source
+    ids = pick_ids(df)  # ROW-n นับแถวในแผ่นของตัวเอง
+    slugs = pd.Series(claim_slugs(slugify_all(ids), used), index=df.index, dtype=object)
+    return AssetData(df, ids, slugs, None)
+
+def iter_chunks(sources, chunk_rows=CHUNK_ROWS, tag=None):
+    """yield AssetData ทีละ chunk (ไม่เกิน chunk_rows แถว, คอลัมน์ชุดเดียวกันทั้ง chunk) จากทุกแหล่ง
+    ค่าในเซลล์เก็บตามที่ openpyxl อ่านได้ (dtype object) ไม่แปลงทั้งคอลัมน์แบบ read_excel
+    tag=None → ใส่คอลัมน์ SOURCE_COL เมื่อมีมากกว่าหนึ่งแหล่ง; version ของ chunk เป็น None
+    """
+    tag = len(sources) > 1 if tag is None else tag
+    used = set()  # slug ทั้งชุด ให้ชื่อไฟล์ไม่ชนข้ามแผ่น/ข้ามไฟล์
+    for path, sheet in sources:
+        source = f"{Path(path).stem}/{sheet}" if tag else None
+        rows = iter_sheet_rows(path, sheet)
+        columns = next(rows, None)
+        if columns is None:
+            continue
+        if source is not None and SOURCE_COL in columns:
+            raise ValueError(f"{path} [{sheet}] มีคอลัมน์ {SOURCE_COL} อยู่แล้ว")
+        buf, start = [], 0
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= chunk_rows:
+                yield _chunk_data(buf, columns, start, used, source)
+                start += len(buf); buf = []
+        if buf:
+            yield _chunk_data(buf, columns, start, used, source)
+
+def sources_version(sources, cache_dir=CACHE_DIR) -> str:
+    """hash ของชุดแหล่งข้อมูล (digest ของแต่ละไฟล์ + ชื่อแผ่น) ใช้เป็น version ของข้อมูลรวม"""
+    parts = [[file_digest(p, cache_dir), sheet] for p, sheet in sources]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+def load_sources(sources, cache_dir=CACHE_DIR) -> AssetData:
+    """ทุก chunk ของ iter_chunks รวมเป็น AssetData เดียว (สำหรับ dashboard ที่ต้องใช้ทั้งตาราง)"""
+    chunks = list(iter_chunks(sources))
+    if not chunks:
+        return AssetData(pd.DataFrame(), pd.Series(dtype=object), pd.Series(dtype=object),
+                         sources_version(sources, cache_dir))
+    df = pd.concat([c.df for c in chunks], ignore_index=True)
+    ids = pd.Series([v for c in chunks for v in c.ids], index=df.index, dtype=object)
+    slugs = pd.Series([v for c in chunks for v in c.slugs], index=df.index, dtype=object)
+    return AssetData(df, ids, slugs, sources_version(sources, cache_dir))
@@ -0,0 +1,108 @@
+# asset_search.py
+"""
+Search index for the dashboard filter, built once per dataset version.
+
+Every row is normalised once (NFC + casefold, zero-width characters removed,
+whitespace collapsed — Thai text is compared as-is after NFC) and stored as
+  - an exact-ID table (asset ID, slug and every ID_PRIORITY column) for sticker lookups,
+  - a sorted key list for ID prefix and word prefix lookups via bisect,
+  - one concatenated text blob scanned with str.find for substring matches,
+so a query never copies or lower-cases the table again.
+"""
+import re, unicodedata
+from bisect import bisect_left, bisect_right
+import pandas as pd
+from asset_data import ID_PRIORITY
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff"))
+_SPACES = re.compile(r"\s+")
+# แยกคำด้วยช่องว่าง/เครื่องหมายเท่านั้น (\W จะตัดสระ/วรรณยุกต์ไทยซึ่งเป็น combining mark)
+_WORD_SPLIT = re.compile(r"[\s\-_/\\,;:|()\[\]{}\"'.·]+")
+_SEP = "\x00"  # คั่นระหว่างแถวใน blob (ไม่มีทางอยู่ในคำค้น)
+
+# อันดับผลลัพธ์: ยิ่งน้อยยิ่งตรง
+RANK_EXACT_ID, RANK_ID_PREFIX, RANK_WORD_PREFIX, RANK_SUBSTRING = range(4)
+
+def normalize(s) -> str:
+    s = unicodedata.normalize("NFC", str(s)).translate(_ZERO_WIDTH).casefold()
+    return _SPACES.sub(" ", s).strip()
+
+def _cell_text(v) -> str:
+    return "" if pd.isna(v) else str(v)
+
+def _prefix_range(keys, prefix):
+    """ช่วง [lo, hi) ของ keys (list ของ (key, pos) ที่เรียงแล้ว) ที่ขึ้นต้นด้วย prefix"""
+    lo = bisect_left(keys, (prefix,))
+    hi = bisect_right(keys, (prefix + "\U0010ffff",))
+    return lo, hi
+
+class SearchIndex:
+    def __init__(self, df, ids, slugs):
+        self.labels = list(df.index)
+        id_cols = [c for c in ID_PRIORITY if c in df.columns]
+
+        exact, id_keys, word_keys, texts = {}, set(), set(), []
+        for pos, (asset_id, slug, *cells) in enumerate(zip(ids, slugs, *(df[c] for c in df.columns))):
+            row = dict(zip(df.columns, cells))
+            for v in [asset_id, slug] + [row[c] for c in id_cols]:
+                key = normalize(_cell_text(v))
+                if key:
+                    exact.setdefault(key, []).append(pos)
+                    id_keys.add((key, pos))
+            text = normalize(" ".join(t for t in map(_cell_text, [asset_id, *cells]) if t))
+            texts.append(text)
+            for w in _WORD_SPLIT.split(text):
+                if w: word_keys.add((w, pos))
+
+        self._exact = {k: sorted(set(v)) for k, v in exact.items()}
+        self._id_keys = sorted(id_keys)
+        self._word_keys = sorted(word_keys)
+        # blob = แถว0 \0 แถว1 \0 ... ; _starts[i] = offset เริ่มของแถว i
+        self._blob = _SEP.join(texts)
+        self._starts, off = [], 0
+        for t in texts:
+            self._starts.append(off); off += len(t) + 1
+
+    def __len__(self):
+        return len(self.labels)
+
+    def lookup_id(self, q):
+        """ค้น ID ตรงตัว (ไม่สนตัวพิมพ์) — คืน index label ของแถวที่ตรง"""
+        return [self.labels[p] for p in self._exact.get(normalize(q), [])]
+
+    def _substring(self, nq):
+        blob, starts, pos = self._blob, self._starts, 0
+        while True:
+            hit = blob.find(nq, pos)
+            if hit < 0:
+                return
+            row = bisect_right(starts, hit) - 1
+            yield row
+            # ข้ามส่วนที่เหลือของแถวนี้ เจอแล้วไม่ต้องหาซ้ำ
+            pos = starts[row + 1] if row + 1 < len(starts) else len(blob)
+
+    def search(self, q, limit=None):
+        """คืน [(index label, rank)] เรียงตามความตรง แล้วตามลำดับแถวเดิม"""
+        nq = normalize(q)
+        if not nq:
+            return []
+        best = {}
+        def add(positions, rank):
+            for p in positions:
+                if p not in best or rank < best[p]: best[p] = rank
+
+        add(self._exact.get(nq, []), RANK_EXACT_ID)
+        lo, hi = _prefix_range(self._id_keys, nq)
+        add((p for _, p in self._id_keys[lo:hi]), RANK_ID_PREFIX)
+        lo, hi = _prefix_range(self._word_keys, nq)
+        add((p for _, p in self._word_keys[lo:hi]), RANK_WORD_PREFIX)
+        add(self._substring(nq), RANK_SUBSTRING)
+
+        ranked = sorted(best.items(), key=lambda kv: (kv[1], kv[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self.labels[p], rank) for p, rank in ranked]
+
+def build_index(data) -> SearchIndex:
+    """สร้าง index จาก asset_data.AssetData"""
+    return SearchIndex(data.df, data.ids, data.slugs)
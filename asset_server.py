@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lookup server for QR scans: serves /pages/<slug>.html rendered on demand from the
+current workbook, so an edit in Excel shows up on the next scan without rebuilding
+and redeploying the static pages. Standard library only (http.server).
+
+The dataset is loaded through asset_data (same cache, same pick_id/slugify rules and
+file names as build_pages_and_qr.py) into a slug → row index. Pages are rendered with
+the same PageRenderer layout, kept in a small LRU, and sent with ETag / Last-Modified
+so repeat scans get 304. The workbook's mtime/size is checked at most once per
+--check-seconds and the index is swapped in atomically when it changes.
+
+Usage:
+  python asset_server.py                                 # http://127.0.0.1:8000/pages/
+  python asset_server.py --host 0.0.0.0 --port 8080 --excel "Smart Asset Lab.xlsx"
+จากนั้นตั้ง BASE_URL ใน build_pages_and_qr.py เป็น http://<host>:<port>/pages/ ให้ QR ชี้มาที่นี่
+"""
+import sys, json, time, html, hashlib, argparse, threading
+from collections import namedtuple
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlsplit, unquote
+from asset_data import EXCEL_PATH, load_assets, load_sources, find_sources
+from page_render import PageRenderer
+from qr_render import BytesLRU
+
+CHECK_SECONDS = 1.0
+
+# ข้อมูลชุดหนึ่งที่ใช้ตอบ request — เปลี่ยนทั้งก้อนเมื่อโหลดใหม่ (request ที่กำลังทำอยู่ใช้ก้อนเดิมต่อได้)
+Snapshot = namedtuple("Snapshot", "data by_slug renderer stat last_modified index_html")
+
+class AssetIndex:
+    def __init__(self, path=EXCEL_PATH, all_sheets=False, check_seconds=CHECK_SECONDS):
+        self.path = Path(path)
+        self.all_sheets = all_sheets
+        self.check_seconds = check_seconds
+        self.pages = BytesLRU(16 * 1024 * 1024)  # (version, slug) → HTML bytes
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self._snap = self._load(self._file_stat())
+
+    def _file_stat(self):
+        st = self.path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self, stat):
+        if self.all_sheets:
+            data = load_sources(find_sources([self.path], all_sheets=True))
+        else:
+            data = load_assets(self.path)
+        by_slug = {slug: pos for pos, slug in enumerate(data.slugs)}
+        rows = sorted(zip(data.ids, data.slugs), key=lambda x: str(x[0]))
+        idx = "<!doctype html><meta charset='utf-8'><title>Smart Asset – Index</title><h2>Smart Asset – รายการหน้า</h2><ol>"
+        idx += "".join(f"<li><a href='{html.escape(slug)}.html'>{html.escape(str(asset_id))}</a></li>"
+                       for asset_id, slug in rows)
+        idx += "</ol>"
+        return Snapshot(data, by_slug, PageRenderer(data.df.columns), stat,
+                        stat[0] // 1_000_000_000, idx.encode("utf-8"))
+
+    def snapshot(self) -> Snapshot:
+        """ข้อมูลปัจจุบัน — ไฟล์ Excel เปลี่ยน (mtime/size) → โหลดใหม่ก่อนตอบ"""
+        if time.monotonic() - self._checked < self.check_seconds:
+            return self._snap
+        with self._lock:
+            if time.monotonic() - self._checked >= self.check_seconds:
+                self._checked = time.monotonic()
+                try:
+                    stat = self._file_stat()
+                    if stat != self._snap.stat:
+                        self._snap = self._load(stat)
+                        print(f"reloaded {self.path} ({len(self._snap.by_slug)} assets)", file=sys.stderr)
+                except Exception as e:  # ไฟล์กำลังถูกบันทึก/อ่านไม่ได้ชั่วคราว → ใช้ข้อมูลเดิมแล้วลองใหม่รอบหน้า
+                    print(f"reload failed, keeping previous data: {e}", file=sys.stderr)
+        return self._snap
+
+    def page(self, snap, slug):
+        """HTML bytes ของ slug (None = ไม่มีรายการนี้)"""
+        pos = snap.by_slug.get(slug)
+        if pos is None:
+            return None
+        key = (snap.data.version, slug)
+        body = self.pages.get(key)
+        if body is None:
+            data = snap.data
+            body = next(snap.renderer.render_frame(data.df.iloc[[pos]], [data.ids.iloc[pos]])).encode("utf-8")
+            self.pages.put(key, body)
+        return body
+
+def _not_modified(headers, etag, last_modified):
+    """เงื่อนไข 304: If-None-Match ตรง ETag หรือ (ไม่มี If-None-Match และ) If-Modified-Since ไม่เก่ากว่าข้อมูล"""
+    inm = headers.get("If-None-Match")
+    if inm is not None:
+        return inm.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in inm.split(",")]
+    ims = headers.get("If-Modified-Since")
+    if ims:
+        try:
+            return parsedate_to_datetime(ims).timestamp() >= last_modified
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class LookupHandler(BaseHTTPRequestHandler):
+    server_version = "SmartAssetLookup/1.0"
+    index = None  # AssetIndex — ตั้งใน serve()
+
+    def do_GET(self):
+        self._respond(head=False)
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def _respond(self, head):
+        path = unquote(urlsplit(self.path).path)
+        snap = self.index.snapshot()
+        if path == "/healthz":
+            body = json.dumps({"assets": len(snap.by_slug), "version": snap.data.version,
+                               "last_modified": formatdate(snap.last_modified, usegmt=True)}).encode("utf-8")
+            return self._send(body, "application/json", head=head)
+        if path in ("/", "/pages", "/pages/", "/pages/index.html"):
+            return self._send(snap.index_html, "text/html; charset=utf-8", snap.last_modified, head)
+        if path.startswith("/pages/") and path.endswith(".html"):
+            body = self.index.page(snap, path[len("/pages/"):-len(".html")])
+            if body is not None:
+                return self._send(body, "text/html; charset=utf-8", snap.last_modified, head)
+        self._send("ไม่พบรายการ".encode("utf-8"), "text/plain; charset=utf-8", head=head,
+                   status=HTTPStatus.NOT_FOUND)
+
+    def _send(self, body, ctype, last_modified=None, head=False, status=HTTPStatus.OK):
+        headers = {"Content-Type": ctype}
+        if status == HTTPStatus.OK and last_modified is not None:
+            etag = '"%s"' % hashlib.sha256(body).hexdigest()[:20]
+            headers.update({"ETag": etag, "Last-Modified": formatdate(last_modified, usegmt=True),
+                            "Cache-Control": "no-cache"})  # เก็บได้ แต่ต้องถามก่อนใช้ทุกครั้ง → ได้ข้อมูลล่าสุดเสมอ
+            if _not_modified(self.headers, etag, last_modified):
+                status, body = HTTPStatus.NOT_MODIFIED, b""
+                del headers["Content-Type"]
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head and body:
+            self.wfile.write(body)
+
+def serve(index, host="127.0.0.1", port=8000):
+    handler = type("Handler", (LookupHandler,), {"index": index})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving {len(index.snapshot().by_slug)} assets on http://{host}:{port}/pages/", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve asset pages rendered on demand from the Excel workbook")
+    ap.add_argument("--excel", default=EXCEL_PATH, help=f"ไฟล์ Excel (ค่าเริ่มต้น {EXCEL_PATH})")
+    ap.add_argument("--all-sheets", action="store_true", help="อ่านทุกแผ่นงาน (ค่าเริ่มต้นเฉพาะแผ่นแรก)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--check-seconds", type=float, default=CHECK_SECONDS,
+                    help="เช็คว่าไฟล์ Excel เปลี่ยนหรือยังไม่เกินทุกกี่วินาที")
+    args = ap.parse_args(argv)
+    if not Path(args.excel).exists():
+        print(f"[ERROR] ไม่พบไฟล์ {args.excel}", file=sys.stderr)
+        sys.exit(1)
+    serve(AssetIndex(args.excel, args.all_sheets, args.check_seconds), args.host, args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark the build pipeline and dashboard helpers on synthetic workbooks.
+
+Every size runs in its own child process, so peak RSS is per size. Stages:
+  excel_parse   asset_data.read_sheet on the synthetic .xlsx
+  resolve_ids   asset_data.resolve_ids (pick_id + slug de-dup)
+  html_render   PageRenderer.render_frame over every row
+  qr_encode     make_qr_img            (first --qr-limit rows)
+  png_write     PNG encode + write     (same rows)
+  label_draw    draw_label_under       (same rows)
+  pdf_raster    layout_qr_pdf on the labelled PNGs
+  pdf_vector    qr_matrix + layout_qr_pdf(vector=True)
+
+Usage:
+  python benchmarks/bench_pipeline.py                       # 1k, 10k, 100k rows
+  python benchmarks/bench_pipeline.py --sizes 1000 --qr-limit 200
+  python benchmarks/bench_pipeline.py --compare benchmarks/results/old.json
+"""
+import os, sys, io, json, time, random, argparse, platform, subprocess, tempfile
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+RESULTS = ROOT / "benchmarks" / "results"
+STAGES = ["excel_parse", "resolve_ids", "html_render", "qr_encode", "png_write",
+          "label_draw", "pdf_raster", "pdf_vector"]
+
+# --- synthetic data --------------------------------------------------------
+COLUMNS = ["ลำดับ","ชื่อ","รหัสเครื่องมือห้องปฏิบัติการ","AssetID","ปี","ยี่ห้อ","โมเดล","หมายเลขเครื่อง",
+           "ต้นทุนต่อหน่วย","สถานะ","สถานที่ใช้งาน (ปัจจุบัน)","ผู้รับผิดชอบ (ปัจจุบัน)","รูปภาพ","QR Code"]
+NAMES = ["เก้าอี้ทำงานพนักพิงเตี้ยมีท้าวแขน", "ตู้เย็นเก็บสารเคมี", "เครื่องปั่นเหวี่ยง", "กล้องจุลทรรศน์",
+         "เครื่องชั่งดิจิตอล", "ตู้อบฆ่าเชื้อ", "Microcentrifuge", "Pipette 100-1000 uL"]
+PLACES = ["ห้องปฏิบัติการเทคนิคการแพทย์", "หอผู้ป่วยใน 3", "ห้องฉุกเฉิน", "คลังพัสดุ"]
+OWNERS = ["นายจักรพล  สมศรี", "นางสาวสุดา ใจดี", "นายสมชาย รักงาน"]
+STATUS = ["ใช้งาน", "ตรวจไม่พบ", "ชำรุด"]
+
+def synthetic_frame(n, seed=0):
+    import pandas as pd
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        rows.append([
+            i + 1, f"{rnd.choice(NAMES)} ({rnd.randint(100, 999)})", f"LAB-AS-{i+1:06d}",
+            f"100-ZFA{rnd.randint(1,15):02d}-{rnd.randint(1000,9999)}-{rnd.randint(1,50):03d}-{i:06d}",
+            rnd.randint(50, 67), rnd.choice(["", "Eppendorf", "Olympus", "Sartorius"]) or None,
+            None, f"SN{rnd.randint(10**6, 10**7)}", float(rnd.randint(1, 300) * 500),
+            rnd.choice(STATUS), rnd.choice(PLACES), rnd.choice(OWNERS), None, None,
+        ])
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+def synthetic_workbook(n, cache_dir, seed=0):
+    """สร้าง (หรือใช้ซ้ำ) .xlsx ขนาด n แถว"""
+    path = Path(cache_dir) / f"synthetic-{n}-{seed}.xlsx"
+    if not path.exists():
+        synthetic_frame(n, seed).to_excel(path, index=False)
+    return path
+
+# --- measurement -----------------------------------------------------------
+def peak_rss_mb():
+    """RSS สูงสุดของ process (MB, ทศนิยม 1 ตำแหน่ง) — resource มีเฉพาะ Unix, Windows ใช้ psutil ถ้ามี ไม่งั้น None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        mem = psutil.Process().memory_info()
+        return round(getattr(mem, "peak_wset", mem.rss) / (1024 * 1024), 1)  # peak_wset มีเฉพาะ Windows
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)  # macOS รายงานเป็นไบต์
+
+class Recorder:
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, items, func):
+        t0 = time.perf_counter()
+        out = func()
+        dt = time.perf_counter() - t0
+        self.stages[name] = {"seconds": round(dt, 6), "items": items,
+                             "items_per_s": round(items / dt, 2) if dt else None,
+                             "peak_rss_mb": peak_rss_mb()}
+        return out
+
+def bench_one(n, qr_limit, workdir):
+    """วัดทุก stage สำหรับ workbook ขนาด n แถว (รันใน child process)"""
+    from asset_data import read_sheet, resolve_ids
+    from page_render import PageRenderer
+    from qr_render import make_qr_img, draw_label_under, png_bytes, qr_matrix
+    from label_pdf import layout_qr_pdf
+
+    workdir = Path(workdir)
+    xlsx = synthetic_workbook(n, workdir)
+    rec = Recorder()
+    sizes = {"xlsx_bytes": xlsx.stat().st_size}
+
+    df = rec.run("excel_parse", n, lambda: read_sheet(xlsx))
+    ids, slugs = rec.run("resolve_ids", n, lambda: resolve_ids(df))
+
+    def html_all():
+        renderer = PageRenderer(df.columns)
+        return sum(len(h.encode("utf-8")) for h in renderer.render_frame(df, ids))
+    sizes["html_bytes"] = rec.run("html_render", n, html_all)
+
+    nq = min(n, qr_limit)
+    urls = [f"https://example.org/pages/{s}.html" for s in slugs[:nq]]
+    imgs = rec.run("qr_encode", nq, lambda: [make_qr_img(u) for u in urls])
+
+    png_dir = workdir / f"png-{n}"; png_dir.mkdir(exist_ok=True)
+    def write_pngs():
+        total = 0
+        for s, im in zip(slugs[:nq], imgs):
+            data = png_bytes(im); (png_dir / f"{s}.png").write_bytes(data); total += len(data)
+        return total
+    sizes["png_bytes"] = rec.run("png_write", nq, write_pngs)
+
+    captions = list(zip(ids[:nq], df["ชื่อ"].astype(str)[:nq]))
+    labels = rec.run("label_draw", nq,
+                     lambda: [png_bytes(draw_label_under(im, t, b)) for im, (t, b) in zip(imgs, captions)])
+
+    def pdf(vector):
+        buf = io.BytesIO()
+        if vector:
+            layout_qr_pdf(((qr_matrix(u), t, b) for u, (t, b) in zip(urls, captions)), buf, vector=True)
+        else:
+            layout_qr_pdf(labels, buf)
+        return len(buf.getvalue())
+    sizes["pdf_raster_bytes"] = rec.run("pdf_raster", nq, lambda: pdf(False))
+    sizes["pdf_vector_bytes"] = rec.run("pdf_vector", nq, lambda: pdf(True))
+
+    return {"rows": n, "qr_rows": nq, "stages": rec.stages, "sizes": sizes,
+            "peak_rss_mb": peak_rss_mb()}
+
+# --- driver ----------------------------------------------------------------
+def git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def environment():
+    import pandas, PIL, qrcode, reportlab
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "git_rev": git_rev(),
+            "pandas": pandas.__version__, "Pillow": PIL.__version__,
+            "qrcode": getattr(qrcode, "__version__", "?"), "reportlab": reportlab.Version}
+
+def compare(old, new):
+    """พิมพ์อัตราส่วนเวลา new/old ต่อ stage (>1 = ช้าลง)"""
+    old_by = {r["rows"]: r for r in old["results"]}
+    for r in new["results"]:
+        o = old_by.get(r["rows"])
+        if not o: continue
+        print(f"\n{r['rows']} rows vs {old['env'].get('git_rev')}:")
+        for st in STAGES:
+            a, b = o["stages"].get(st), r["stages"].get(st)
+            if a and b and a["seconds"]:
+                print(f"  {st:<12} {b['seconds']/a['seconds']:6.2f}x  ({a['seconds']:.3f}s → {b['seconds']:.3f}s)")
+
+def print_table(res):
+    print(f"\n{res['rows']} rows (QR stages on {res['qr_rows']}), peak RSS {res['peak_rss_mb']} MB")
+    for st in STAGES:
+        s = res["stages"][st]
+        print(f"  {st:<12} {s['seconds']:9.3f}s  {s['items_per_s'] or 0:11.1f}/s  rss {s['peak_rss_mb']} MB")
+    print("  sizes:", ", ".join(f"{k}={v:,}" for k, v in res["sizes"].items()))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default="1000,10000,100000", help="จำนวนแถว คั่นด้วยคอมมา")
+    ap.add_argument("--qr-limit", type=int, default=1000,
+                    help="จำนวนแถวสูงสุดที่ใช้วัด stage QR/PNG/PDF (QR ช้าเกินจะวัดครบ 100k)")
+    ap.add_argument("--workdir", default=None, help="ที่เก็บ workbook สังเคราะห์ (ใช้ซ้ำได้)")
+    ap.add_argument("--out", default=None, help="ไฟล์ JSON ผลลัพธ์ (ค่าเริ่มต้น benchmarks/results/)")
+    ap.add_argument("--compare", default=None, help="JSON ผลเก่าที่จะเทียบ")
+    ap.add_argument("--one", type=int, default=None, help=argparse.SUPPRESS)  # ใช้ภายใน: child process
+    args = ap.parse_args(argv)
+
+    workdir = Path(args.workdir or Path(tempfile.gettempdir()) / "smartasset-bench")
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    if args.one is not None:
+        json.dump(bench_one(args.one, args.qr_limit, workdir), sys.stdout)
+        return
+
+    results = []
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        cmd = [sys.executable, __file__, "--one", str(n), "--qr-limit", str(args.qr_limit),
+               "--workdir", str(workdir)]
+        res = json.loads(subprocess.check_output(cmd, cwd=ROOT))
+        print_table(res); results.append(res)
+
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "env": environment(),
+              "qr_limit": args.qr_limit, "results": results}
+    out = Path(args.out) if args.out else RESULTS / f"bench-{report['env']['git_rev']}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=1), encoding="utf-8")
+    print("\nResults:", out)
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), report)
+
+if __name__ == "__main__":
+    main()
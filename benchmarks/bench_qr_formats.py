@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare QR file formats (qr_render.QR_FORMATS) by size and encode time.
+
+Every URL is encoded to a module matrix once (timed separately as "matrix"),
+then written in each format at each box size. png24 is the old builder output
+and is the baseline for the size ratio.
+
+Usage:
+  python benchmarks/bench_qr_formats.py                     # 500 URLs, box 4,6,10
+  python benchmarks/bench_qr_formats.py --count 2000 --box-sizes 6,10
+  python benchmarks/bench_qr_formats.py --urls-from SmartAsset_QR_Pages/.build_manifest.json
+"""
+import sys, json, time, argparse
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bench_pipeline import RESULTS, environment
+from qr_render import QR_FORMATS, qr_matrix, matrix_bytes
+
+BASE = "https://copteryokky.github.io/SmartAsset_QR_Package/pages/"
+
+def sample_urls(count, manifest=None):
+    """URL จริงจาก manifest ของ builder (ถ้าให้มา) หรือ URL สังเคราะห์แบบเดียวกับ builder"""
+    if manifest:
+        m = json.loads(Path(manifest).read_text(encoding="utf-8"))
+        return [f"{m['base_url']}{slug}.html" for slug in sorted(m["assets"])][:count]
+    return [f"{BASE}LAB-AS-{i:06d}.html" for i in range(1, count + 1)]
+
+def run(urls, box_sizes):
+    t0 = time.perf_counter()
+    matrices = [qr_matrix(u) for u in urls]
+    rows = [{"format": "matrix", "box_size": None, "seconds": round(time.perf_counter() - t0, 6), "bytes": 0}]
+    for box in box_sizes:
+        for fmt in QR_FORMATS:
+            t0 = time.perf_counter()
+            total = sum(len(matrix_bytes(m, fmt, box)) for m in matrices)
+            rows.append({"format": fmt, "box_size": box, "seconds": round(time.perf_counter() - t0, 6),
+                         "bytes": total})
+    return rows
+
+def print_table(rows, n):
+    base = {r["box_size"]: r["bytes"] for r in rows if r["format"] == "png24"}
+    print(f"\n{n} QR codes (matrix encode {rows[0]['seconds']:.3f}s, not included below)")
+    print(f"  {'format':<7} {'box':>3} {'bytes/file':>11} {'total':>10} {'vs png24':>9} {'ms/file':>8}")
+    for r in rows[1:]:
+        ratio = r["bytes"] / base[r["box_size"]] if base.get(r["box_size"]) else 0
+        print(f"  {r['format']:<7} {r['box_size']:>3} {r['bytes'] / n:>11,.0f} {r['bytes'] / 1e6:>8.2f}MB "
+              f"{ratio:>8.2f}x {r['seconds'] * 1000 / n:>8.3f}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=500, help="จำนวน URL ที่ใช้วัด")
+    ap.add_argument("--box-sizes", default="4,6,10", help="พิกเซลต่อ module คั่นด้วยคอมมา")
+    ap.add_argument("--urls-from", default=None, help=".build_manifest.json ของ builder (ใช้ slug จริง)")
+    ap.add_argument("--out", default=None, help="ไฟล์ JSON ผลลัพธ์ (ค่าเริ่มต้น benchmarks/results/)")
+    args = ap.parse_args(argv)
+
+    urls = sample_urls(args.count, args.urls_from)
+    rows = run(urls, [int(x) for x in args.box_sizes.split(",") if x.strip()])
+    print_table(rows, len(urls))
+
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "env": environment(),
+              "count": len(urls), "results": rows}
+    out = Path(args.out) if args.out else RESULTS / f"qr-formats-{report['env']['git_rev']}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=1), encoding="utf-8")
+    print("\nResults:", out)
+
+if __name__ == "__main__":
+    main()
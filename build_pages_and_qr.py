@@ -2,30 +2,39 @@
 # -*- coding: utf-8 -*-
 """
 Build per-asset HTML pages (Bootstrap form style) and QR codes that link to those pages.
-Input: Smart Asset Lab.xlsx (first sheet)
+Input: Smart Asset Lab.xlsx (first sheet), or --input files/folders (--all-sheets for every sheet)
 Output:
   - ./pages/<slug>.html (and index.html)
-  - ./qrcodes/<slug>.png
-  - ./qr_labels_A4_pages.pdf (A4 layout 3x8 for printing)
+  - ./qrcodes/<slug>.png (or .svg / .webp, see --qr-format)
+  - ./qr_labels_A4_pages.pdf (A4 layout 3x8 for printing; other sheets via --layout → qr_labels_<layout>.pdf)
 
 Usage:
   pip install pandas openpyxl "qrcode[pil]" reportlab Pillow
   python build_pages_and_qr.py
+  python build_pages_and_qr.py --incremental   # สร้างใหม่เฉพาะแถวที่เพิ่ม/แก้ไข
+  python build_pages_and_qr.py --jobs 4        # จำนวน process สำหรับสร้าง QR (ค่าเริ่มต้น = ทุกคอร์)
+  python build_pages_and_qr.py --vector-pdf    # PDF วาด QR เป็นเวกเตอร์ (ไฟล์เล็ก คมทุกขนาด)
+  python build_pages_and_qr.py --production    # CSS ในเครื่อง + .gz/.br + index แบ่งหน้า/ค้นหาได้
+  python build_pages_and_qr.py --profile cprofile   # หรือ tracemalloc — เวลาแต่ละขั้นอยู่ใน build_report.json เสมอ
+  python build_pages_and_qr.py --qr-format svg --box-size 8   # png (1 บิต, ค่าเริ่มต้น) / png24 / svg / webp
+  python build_pages_and_qr.py --input data/ --all-sheets    # ทุกแผ่นของทุกไฟล์ในโฟลเดอร์ อ่านแบบ stream ทีละ chunk
+  python build_pages_and_qr.py --layout avery-l7160 --start-at 5   # แผ่นสติ๊กเกอร์อื่น / เริ่มที่ช่องที่ 6
 """
-import os, re, html, sys
-import pandas as pd
+import os, html, sys, json, time, hashlib, argparse
 from pathlib import Path
-import qrcode
-from PIL import Image
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
+from qr_render import imap_ordered, qr_bytes, qr_outputs, QR_FORMATS
+from label_pdf import layout_qr_pdf, PROFILES, DEFAULT_PROFILE
+from asset_data import load_assets, find_sources, iter_chunks, CHUNK_ROWS, WORKBOOK_EXTS
+from page_render import PageRenderer
+import site_output
+from run_report import RunReport, timed_call, profiled, PROFILE_MODES
 
 EXCEL_PATH = "Smart Asset Lab.xlsx"  # first sheet
 OUT = Path("SmartAsset_QR_Pages")
 PAGES = OUT / "pages"
-QRPNG = OUT / "qrcodes"
+QRDIR = OUT / "qrcodes"
+MANIFEST = OUT / ".build_manifest.json"
+REPORT = OUT / "build_report.json"
 
 # ใช้ของคุณแล้ว
 BASE_URL = "https://copteryokky.github.io/SmartAsset_QR_Package/pages/"
@@ -34,154 +43,278 @@ BASE_URL = "https://copteryokky.github.io/SmartAsset_QR_Package/pages/"
 def ensure_trailing_slash(url: str) -> str:
     return url if url.endswith("/") else (url + "/")
 
-def pick_id(row):
-    # ให้ "รหัสเครื่องมือห้องปฏิบัติการ" มาก่อน จากนั้นจึง AssetID (วิธีที่ดีที่สุด)
-    for k in ["รหัสเครื่องมือห้องปฏิบัติการ","AssetID","รหัส","รหัสครุภัณฑ์","Code","ID","Asset Id","Asset_ID"]:
-        if k in row.index and pd.notna(row[k]) and str(row[k]).strip():
-            return str(row[k]).strip()
-    return f"ROW-{int(row.name)+1}"
-
-def slugify(s):
-    s = str(s or "").strip()
-    s = re.sub(r"[^\w\-]+", "-", s, flags=re.UNICODE)  # เว้นวรรค/อักขระพิเศษ -> -
-    s = re.sub(r"-+", "-", s).strip("-")               # ลด -- ให้เหลือ -
-    return s or "item"
-
-def render_page(title, rows):
-    form_rows = ""
-    for label, val in rows:
-        sval = "" if (pd.isna(val) or str(val).lower()=="nan") else str(val)
-        sval = html.escape(sval)
-        form_rows += f"""
-        <div class="mb-3 row">
-          <label class="col-sm-3 col-form-label fw-semibold">{html.escape(str(label))}</label>
-          <div class="col-sm-9">
-            <input type="text" class="form-control" value="{sval}" readonly>
-          </div>
-        </div>"""
-    return f"""<!doctype html>
-<html lang="th">
-  <head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <title>{html.escape(title)}</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-      body{{background:#f8fafc}}
-      .card{{max-width:880px;margin:32px auto;border-radius:16px;box-shadow:0 6px 24px rgba(0,0,0,.06)}}
-      .card-header{{background:#0d6efd;color:white;border-top-left-radius:16px;border-top-right-radius:16px}}
-      .col-form-label{{color:#334155}}
-      .form-control[readonly]{{background:#fff}}
-    </style>
-  </head>
-  <body>
-    <div class="card">
-      <div class="card-header">
-        <h4 class="m-0">ข้อมูลเครื่องมือห้องปฏิบัติการ</h4>
-      </div>
-      <div class="card-body">
-        {form_rows}
-        <div class="mt-4 text-center text-muted">© Smart Asset — QR Detail Page</div>
-      </div>
-    </div>
-  </body>
-</html>"""
+def qr_path(slug, fmt="png"):
+    return QRDIR / f"{slug}{QR_FORMATS[fmt]}"
+
+def iter_qr_images(records, fmt="png", box_size=10, jobs=None, report=None):
+    """yield ไฟล์ QR (PNG/WebP bytes) ของทุกรายการตามลำดับแถว
+    แถวที่ fresh → เข้ารหัสใหม่ใน pool แล้วเขียน qrcodes/<slug><นามสกุล>, แถวอื่นใช้ไฟล์เดิม
+    """
+    fresh = imap_ordered(timed_call, [(qr_bytes, url, fmt, box_size)
+                                      for _, _, _, url, new in records if new], jobs=jobs)
+    for _, _, slug, url, new in records:
+        path = qr_path(slug, fmt)
+        if new:
+            data, secs = next(fresh)
+            path.write_bytes(data)
+            if report:
+                report.asset(slug, "qr", secs); report.count("qr_bytes", len(data))
+        else:
+            data = path.read_bytes()
+        yield data
+
+def iter_qr_vectors(records, fmt="png", box_size=10, jobs=None, report=None):
+    """yield (matrix, "", "") ของทุกรายการสำหรับ PDF โหมดเวกเตอร์
+    แถวที่ fresh ได้ไฟล์ QR มาจากการเข้ารหัสครั้งเดียวกันและเขียนลง qrcodes/
+    """
+    tasks = [(qr_outputs, url, fmt if new else None, box_size) for _, _, _, url, new in records]
+    for (_, _, slug, _, _), ((data, matrix), secs) in zip(records, imap_ordered(timed_call, tasks, jobs=jobs)):
+        if data is not None:
+            qr_path(slug, fmt).write_bytes(data)
+        if report:
+            report.asset(slug, "qr", secs)
+            if data is not None: report.count("qr_bytes", len(data))
+        yield (matrix, "", "")
+
+# --- incremental manifest --------------------------------------------------
+def text_column(df, col):
+    """คอลัมน์เป็น list ของ str (ค่าว่าง/NaN = "") — ไม่มีคอลัมน์นี้ได้สตริงว่างทั้งหมด"""
+    if col not in df.columns:
+        return [""] * len(df)
+    s = df[col]
+    return ["" if na else str(v) for v, na in zip(s.to_numpy(dtype=object), s.isna().to_numpy())]
+
+def row_hashes(df):
+    """sha256 ของ [[คอลัมน์, ค่า], ...] ของทุกแถว (ค่าว่าง/NaN = "") แปลงค่าทีละคอลัมน์ ไม่ใช้ iterrows"""
+    keys = [json.dumps(str(k), ensure_ascii=False) for k in df.columns]
+    cols = [text_column(df, k) for k in df.columns]
+    out = []
+    for values in zip(*cols):
+        payload = "[" + ",".join(f"[{k},{json.dumps(v, ensure_ascii=False)}]" for k, v in zip(keys, values)) + "]"
+        out.append(hashlib.sha256(payload.encode("utf-8")).hexdigest())
+    return out
+
+def load_manifest(path=MANIFEST):
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"base_url": None, "site": None, "qr": None, "pdf": None, "assets": {}}
+    data.setdefault("base_url", None)
+    data.setdefault("site", None)
+    data.setdefault("qr", None)
+    data.setdefault("pdf", None)
+    data.setdefault("assets", {})
+    return data
+
+def save_manifest(base_url, assets, site=None, qr=None, pdf=None, path=MANIFEST):
+    # site = href ของ CSS ในโหมด production (None = หน้าแบบ CDN) — เปลี่ยนเมื่อไหร่ต้องสร้าง HTML ใหม่หมด
+    # qr = [รูปแบบไฟล์, box_size] — เปลี่ยนเมื่อไหร่ต้องสร้างไฟล์ QR ใหม่หมด (HTML ใช้ของเดิมได้)
+    # pdf = [layout, start_at, vector_pdf] — เปลี่ยนเมื่อไหร่ต้องสร้าง PDF ใหม่แม้แถวไม่เปลี่ยน
+    data = {"base_url": base_url, "site": site, "qr": qr, "pdf": pdf, "assets": assets}
+    Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+
+def asset_chunks(args):
+    """AssetData ทีละ chunk — ค่าเริ่มต้น: แผ่นแรกของ EXCEL_PATH ผ่าน cache เป็น chunk เดียว
+    --input/--all-sheets: อ่าน args.sources (จาก main) แบบ stream (openpyxl read-only) ทีละ --chunk-rows แถว
+    """
+    if args.sources is None:
+        yield load_assets(EXCEL_PATH)
+        return
+    yield from iter_chunks(args.sources, args.chunk_rows)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Build Smart Asset HTML pages, QR codes and a label sheet PDF")
+    ap.add_argument("--input", action="append", default=[], metavar="PATH",
+                    help=f"ไฟล์ Excel หรือโฟลเดอร์ที่มีไฟล์ .xlsx (ใส่ซ้ำได้หลายครั้ง; ค่าเริ่มต้น {EXCEL_PATH}) "
+                         "— อ่านแบบ stream และเพิ่มคอลัมน์แผ่นงานต้นทางเมื่อมีหลายแหล่ง")
+    ap.add_argument("--all-sheets", action="store_true",
+                    help="อ่านทุกแผ่นงานของแต่ละไฟล์ (ค่าเริ่มต้นเฉพาะแผ่นแรก)")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, metavar="N",
+                    help="จำนวนแถวต่อ chunk เมื่ออ่านแบบ stream")
+    ap.add_argument("--incremental", action="store_true",
+                    help="สร้างใหม่เฉพาะแถวที่เพิ่ม/แก้ไข ลบผลลัพธ์ของแถวที่หายไป และข้ามทั้งหมดถ้าไม่มีอะไรเปลี่ยน")
+    ap.add_argument("--jobs", type=int, default=None, metavar="N",
+                    help="จำนวน process สำหรับสร้าง QR (ค่าเริ่มต้น/0 = ทุกคอร์, 1 = ไม่ใช้ pool)")
+    ap.add_argument("--vector-pdf", action="store_true",
+                    help="วาด QR ใน PDF เป็นสี่เหลี่ยมเวกเตอร์แทนการฝังรูป PNG")
+    ap.add_argument("--layout", choices=list(PROFILES), default=DEFAULT_PROFILE,
+                    help="รูปแบบแผ่นสติ๊กเกอร์ของ PDF: " + ", ".join(f"{k} = {p.title}" for k, p in PROFILES.items()))
+    ap.add_argument("--start-at", type=int, default=0, metavar="N",
+                    help="ข้าม N ช่องแรกของแผ่นแรก (พิมพ์ต่อบนแผ่นที่ใช้ไปแล้วบางส่วน)")
+    ap.add_argument("--qr-format", choices=list(QR_FORMATS), default="png",
+                    help="ไฟล์ใน qrcodes/: png = ขาวดำ 1 บิต (เล็กสุดในกลุ่มรูป), png24 = RGB แบบเดิม, "
+                         "svg = เวกเตอร์ (บังคับ --vector-pdf), webp = lossless")
+    ap.add_argument("--box-size", type=int, default=10, metavar="PX",
+                    help="จำนวนพิกเซลต่อ module ของ QR (ค่าเริ่มต้น 10; SVG ใช้เป็นขนาดแสดงผล)")
+    ap.add_argument("--production", action="store_true",
+                    help="ใช้ CSS ไฟล์เดียวในเครื่อง (มี hash ในชื่อ), เขียน .gz/.br คู่ทุกหน้า และแบ่ง index เป็นหน้า + search-index.json")
+    ap.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                    help="ครอบการรันด้วย cProfile/tracemalloc แล้วบันทึกไว้ข้างโฟลเดอร์ผลลัพธ์ "
+                         "(งานใน process pool ไม่ถูกนับ ใช้ร่วมกับ --jobs 1 ถ้าต้องการดู QR)")
+    ap.add_argument("--slowest", type=int, default=10, metavar="N",
+                    help="จำนวนรายการที่ช้าที่สุดที่บันทึกใน build_report.json")
+    args = ap.parse_args(argv)
+    if args.box_size < 1:
+        ap.error("--box-size ต้องมากกว่า 0")
+    if args.chunk_rows < 1:
+        ap.error("--chunk-rows ต้องมากกว่า 0")
+    per_sheet = PROFILES[args.layout].cols * PROFILES[args.layout].rows
+    if not 0 <= args.start_at < per_sheet:
+        ap.error(f"--start-at ต้องอยู่ระหว่าง 0 ถึง {per_sheet - 1} สำหรับ {args.layout}")
+    if args.qr_format == "svg":
+        args.vector_pdf = True  # PDF แบบรูปฝังไฟล์ SVG ไม่ได้
+    return args
 
 # --- main ------------------------------------------------------------------
-def main():
-    # เช็คไฟล์ Excel ก่อน
-    if not Path(EXCEL_PATH).exists():
-        print(f"[ERROR] ไม่พบไฟล์ {EXCEL_PATH} ในโฟลเดอร์นี้", file=sys.stderr)
-        sys.exit(1)
+def main(argv=None):
+    args = parse_args(argv)
 
-    base = ensure_trailing_slash(BASE_URL)
+    # เช็คไฟล์ Excel ก่อน
+    for path in args.input or [EXCEL_PATH]:
+        if not Path(path).exists():
+            print(f"[ERROR] ไม่พบไฟล์ {path} ในโฟลเดอร์นี้", file=sys.stderr)
+            sys.exit(1)
+    args.sources = None
+    if args.input or args.all_sheets:
+        try:
+            args.sources = find_sources(args.input or [EXCEL_PATH], args.all_sheets)
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+        if not args.sources:
+            print(f"[ERROR] ไม่พบไฟล์ Excel ({', '.join(WORKBOOK_EXTS)}) ใน {', '.join(args.input)}", file=sys.stderr)
+            sys.exit(1)
 
     OUT.mkdir(parents=True, exist_ok=True)
     PAGES.mkdir(exist_ok=True)
-    QRPNG.mkdir(exist_ok=True)
-
-    xl = pd.ExcelFile(EXCEL_PATH)
-    sheet_name = xl.sheet_names[0]
-    df = xl.parse(sheet_name).dropna(how="all").reset_index(drop=True)
-
-    prefer = ["ลำดับ","ชื่อ","รหัสเครื่องมือห้องปฏิบัติการ","AssetID","ปี","ยี่ห้อ","โมเดล","หมายเลขเครื่อง",
-              "ต้นทุนต่อหน่วย","สถานะ","สถานที่ใช้งาน (ปัจจุบัน)","ผู้รับผิดชอบ (ปัจจุบัน)","รูปภาพ","QR Code","_qr_image_path"]
-
-    records = []
-    used_slugs = set()  # กันชื่อชน
-
-    for _, row in df.iterrows():
-        asset_id = pick_id(row)
-        slug = slugify(asset_id)
-
-        # กันชื่อไฟล์ชน (เช่น LAB-001 ซ้ำ)
-        orig = slug
-        n = 2
-        while slug in used_slugs:
-            slug = f"{orig}-{n}"
-            n += 1
-        used_slugs.add(slug)
-
-        # จัดลำดับแถวแสดงผล
-        used = set(); rows_kv = []
-        for k in prefer:
-            if k in row.index:
-                rows_kv.append((k, row[k])); used.add(k)
-        for k in row.index:
-            if k not in used:
-                rows_kv.append((k, row[k]))
-
-        # HTML ต่อรายการ
-        html_str = render_page(asset_id, rows_kv)
-        html_path = PAGES / f"{slug}.html"
-        html_path.write_text(html_str, encoding="utf-8")
-
-        # QR → ชี้ไปหน้าออนไลน์
-        page_url = f"{base}{html_path.name}"
-        qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=4)
-        qr.add_data(page_url); qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-        img.save((QRPNG / f"{slug}.png").as_posix(), "PNG")
-
-        records.append((asset_id, html_path.name))
-
-    # index.html (เรียงตามชื่อทรัพย์สิน/ID)
-    records_sorted = sorted(records, key=lambda x: str(x[0]))
-    idx = "<!doctype html><meta charset='utf-8'><title>Smart Asset – Index</title><h2>Smart Asset – รายการหน้า</h2><ol>"
-    for asset_id, fname in records_sorted:
-        idx += f"<li><a href='{fname}'>{html.escape(asset_id)}</a></li>"
-    idx += "</ol>"
-    (PAGES / "index.html").write_text(idx, encoding="utf-8")
-
-    # รวม QR ลง PDF (A4 3x8)
-    page_w, page_h = A4
-    c = canvas.Canvas((OUT / "qr_labels_A4_pages.pdf").as_posix(), pagesize=A4)
-    left_margin = 10*mm; right_margin = 10*mm; top_margin = 12*mm; bottom_margin = 12*mm
-    cols = 3; rows = 8
-    usable_w = page_w - left_margin - right_margin
-    usable_h = page_h - top_margin - bottom_margin
-    cell_w = usable_w / cols; cell_h = usable_h / rows
-
-    pngs = sorted(QRPNG.glob("*.png"))
-    for i, png in enumerate(pngs):
-        if i and i % (cols*rows) == 0:
-            c.showPage()
-        within = i % (cols*rows)
-        r = within // cols
-        cidx = within % cols
-        x0 = left_margin + cidx * cell_w
-        y0 = bottom_margin + (rows - 1 - r) * cell_h
-
-        im = Image.open(png)
-        iw, ih = im.size
-        target_w = 42*mm; target_h = 52*mm
-        aspect = iw/ih
-        w = target_w; h = target_w/aspect
-        if h > target_h: h = target_h; w = target_h*aspect
-        x = x0 + (cell_w - w)/2; y = y0 + (cell_h - h)/2
-        c.drawImage(ImageReader(im), x, y, width=w, height=h, preserveAspectRatio=True)
-
-    c.save()
+    QRDIR.mkdir(exist_ok=True)
+
+    report = RunReport("build", slowest_n=args.slowest)
+    with profiled(args.profile, OUT.parent) as saved:
+        build(args, report)
+    report.save(REPORT)
+    for name, st in report.stages.items():
+        print(f"  {name:<10} {st['seconds']:8.3f}s")
+    print("Report:", REPORT.as_posix(), *(f"Profile: {p.as_posix()}" for p in saved))
+
+def build(args, report):
+    base = ensure_trailing_slash(BASE_URL)
+
+    css_href = site_output.write_site_css(PAGES) if args.production else None
+
+    manifest = load_manifest()
+    # BASE_URL เปลี่ยน = QR ทุกอันชี้ผิด, โหมดหน้าเปลี่ยน = HTML ต่างไปทั้งหมด → สร้างใหม่หมด
+    reuse = args.incremental and manifest["base_url"] == base and manifest["site"] == css_href
+    drop_gz = manifest["site"] is not None and not args.production  # รอบก่อนเป็น production → ลบ .gz/.br ที่ค้าง
+    old_assets = manifest["assets"] if reuse else {}
+    qr_conf = [args.qr_format, args.box_size]
+    same_qr = manifest["qr"] == qr_conf
+    new_assets = {}
+    n_built = n_skipped = 0
+
+    records = []     # (asset_id, ชื่อ, slug, page_url, ต้องสร้าง QR ใหม่หรือไม่) — เก็บเฉพาะค่านี้ข้าม chunk
+    renderers = {}   # ชุดคอลัมน์ → PageRenderer (แต่ละแผ่นงานอาจมีคอลัมน์ต่างกัน)
+
+    # อ่านทีละ chunk (ค่าเริ่มต้นเป็น chunk เดียวจาก cache) พร้อม ID/slug ที่กันชื่อชนแล้ว
+    for data in report.timed(asset_chunks(args), "load"):
+        df = data.df
+        report.count("rows", len(df))
+        t_html = time.perf_counter()
+        todo = []  # ตำแหน่งแถวใน chunk ที่ต้องสร้าง HTML ใหม่
+        hashes = row_hashes(df)
+        names = text_column(df, "ชื่อ")
+        for pos, (asset_id, slug, digest, name) in enumerate(zip(data.ids, data.slugs, hashes, names)):
+            html_path = PAGES / f"{slug}.html"
+            page_url = f"{base}{html_path.name}"  # QR → ชี้ไปหน้าออนไลน์ (สร้างทีหลังแบบขนาน)
+            new_assets[slug] = digest
+            html_ok = old_assets.get(slug) == digest and html_path.exists()
+            qr_ok = html_ok and same_qr and qr_path(slug, args.qr_format).exists()
+            records.append((asset_id, name, slug, page_url, not qr_ok))
+            if html_ok and qr_ok:
+                n_skipped += 1
+                continue
+            n_built += 1
+            if not html_ok:
+                todo.append(pos)
+
+        # HTML ต่อรายการ — ลำดับฟิลด์/แม่แบบเตรียมครั้งเดียว, escape ทีละคอลัมน์เฉพาะแถวที่ต้องสร้าง
+        if todo:
+            cols = tuple(df.columns)
+            renderer = renderers.get(cols)
+            if renderer is None:
+                renderer = renderers[cols] = PageRenderer(cols, css_href=css_href)
+            pages = renderer.render_frame(df.iloc[todo], [data.ids.iloc[p] for p in todo])
+            for pos in todo:
+                t0 = time.perf_counter()
+                html_str = next(pages)
+                slug = data.slugs.iloc[pos]
+                html_path = PAGES / f"{slug}.html"
+                if args.production:
+                    site_output.write_text(html_path, html_str)
+                else:
+                    html_path.write_text(html_str, encoding="utf-8")
+                    if drop_gz: site_output.remove_precompressed(html_path)
+                report.asset(slug, "html", time.perf_counter() - t0)
+                report.count("html_bytes", len(html_str))
+        report.add_time("html", time.perf_counter() - t_html)
+    report.count("rebuilt", n_built); report.count("skipped", n_skipped)
+    if not new_assets and manifest["assets"]:
+        # ไม่ได้แถวเลยแต่รอบก่อนมีข้อมูล — น่าจะอ่านผิดแหล่ง ไม่ลบผลลัพธ์เดิมทิ้งทั้งหมด
+        print(f"[ERROR] ไม่พบแถวข้อมูล แต่รอบก่อนมี {len(manifest['assets'])} รายการ — ไม่ลบ/เขียนทับผลลัพธ์เดิม",
+              file=sys.stderr)
+        sys.exit(1)
+
+    # ลบผลลัพธ์ของแถวที่ถูกลบออกจาก Excel
+    removed = [s for s in manifest["assets"] if s not in new_assets]
+    qr_exts = set(QR_FORMATS.values())
+    # รูปแบบไฟล์ QR เปลี่ยน → ไฟล์นามสกุลอื่นของรอบก่อนค้างอยู่
+    stale_exts = [] if same_qr else sorted(qr_exts - {QR_FORMATS[args.qr_format]})
+    with report.stage("cleanup"):
+        for slug in removed:
+            (PAGES / f"{slug}.html").unlink(missing_ok=True)
+            site_output.remove_precompressed(PAGES / f"{slug}.html")
+            for ext in qr_exts:
+                (QRDIR / f"{slug}{ext}").unlink(missing_ok=True)
+        for slug in new_assets if stale_exts else ():
+            for ext in stale_exts:
+                (QRDIR / f"{slug}{ext}").unlink(missing_ok=True)
+    report.count("deleted", len(removed))
+
+    pdf_name = "qr_labels_A4_pages.pdf" if args.layout == DEFAULT_PROFILE else f"qr_labels_{args.layout}.pdf"
+    pdf_path = (OUT / pdf_name).as_posix()
+    pdf_conf = [args.layout, args.start_at, args.vector_pdf]
+    rows_same = args.incremental and not n_built and not removed
+    if rows_same and manifest["pdf"] == pdf_conf and Path(pdf_path).exists():
+        print(f"Nothing changed: rebuilt 0, skipped {n_skipped}, deleted 0")
+        return
+
+    # index.html (เรียงตามชื่อทรัพย์สิน/ID) — แถวไม่เปลี่ยน (แค่ตั้งค่า PDF ต่าง/ไฟล์ PDF หาย) ใช้ของเดิม
+    if not rows_same:
+        with report.stage("index"):
+            records_sorted = sorted(records, key=lambda x: str(x[0]))
+            if args.production:
+                site_output.write_paged_index(PAGES, [(a, n, s) for a, n, s, _, _ in records_sorted], css_href)
+            else:
+                idx = "<!doctype html><meta charset='utf-8'><title>Smart Asset – Index</title><h2>Smart Asset – รายการหน้า</h2><ol>"
+                for asset_id, _, slug, _, _ in records_sorted:
+                    idx += f"<li><a href='{slug}.html'>{html.escape(asset_id)}</a></li>"
+                idx += "</ol>"
+                (PAGES / "index.html").write_text(idx, encoding="utf-8")
+                if drop_gz: site_output.clean_production(PAGES)
+
+    # สร้าง QR (เฉพาะแถวที่เปลี่ยน) แล้วส่งต่อเข้า PDF (ตาม --layout) ทีละใบตามลำดับแถว
+    # สอง stage นี้ทำงานสลับกันแบบ stream จึงจับเวลารวมเป็น "qr+pdf" ส่วนเวลาเข้ารหัสต่อรายการอยู่ใน assets
+    sheet = dict(profile=args.layout, start_at=args.start_at)
+    with report.stage("qr+pdf"):
+        qr_opts = dict(fmt=args.qr_format, box_size=args.box_size, jobs=args.jobs, report=report)
+        if args.vector_pdf:
+            n = layout_qr_pdf(iter_qr_vectors(records, **qr_opts), pdf_path, vector=True, **sheet)
+        else:
+            n = layout_qr_pdf(iter_qr_images(records, **qr_opts), pdf_path, **sheet)
+    report.count("labels", n)
+    report.count("pdf_bytes", Path(pdf_path).stat().st_size)
+    save_manifest(base, new_assets, site=css_href, qr=qr_conf, pdf=pdf_conf)
+    print(f"Rebuilt {n_built}, skipped {n_skipped}, deleted {len(removed)}")
     print("Done. Open folder:", OUT.as_posix())
 
 if __name__ == "__main__":
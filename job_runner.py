@@ -0,0 +1,123 @@
+# job_runner.py
+"""
+Background runner for long dashboard jobs (label PDF, ZIP export).
+
+The dashboard keeps one JobRunner per server process (st.cache_resource), so all
+sessions share it: at most `workers` jobs run at a time on a small thread pool
+and the rest wait in its queue (each job can still fan out to a process pool via
+qr_render.imap_ordered). Jobs are keyed by what they produce — submitting a key
+that is already queued/running joins that job, and finished results stay in a
+BytesLRU so the same request from another session is answered at once.
+"""
+import json, time, hashlib, threading
+from concurrent.futures import ThreadPoolExecutor
+from qr_render import BytesLRU
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+
+class JobCancelled(Exception):
+    pass
+
+def job_key(*parts) -> str:
+    """key สั้น ๆ จากส่วนประกอบที่ JSON ได้ (เช่น ชนิดงาน, เวอร์ชันข้อมูล, BASE_URL, รายการ slug)"""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class Job:
+    def __init__(self, key, total=0):
+        self.key = key
+        self.total = total
+        self.done = 0
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.seconds = None
+        self.watchers = 0  # จำนวน session ที่รองานนี้ — ยกเลิกจริงเมื่อไม่มีใครรอแล้ว
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def cancelled(self):
+        """ถูกสั่งยกเลิกแล้ว (worker อาจยังไม่ถึง tick ถัดไป) — งานนี้ใช้ต่อไม่ได้"""
+        return self._cancel.is_set()
+
+    @property
+    def progress(self) -> float:
+        if self.status == DONE:
+            return 1.0
+        return min(1.0, self.done / self.total) if self.total else 0.0
+
+    def tick(self, n=1):
+        """นับความคืบหน้า — ถ้างานถูกยกเลิกจะโยน JobCancelled ให้ฟังก์ชันงานหยุด"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.done += n
+
+    def track(self, items):
+        """ส่ง items ต่อทีละชิ้นพร้อม tick — ปิด generator ต้นทาง (เช่น process pool) เมื่อหยุดกลางทาง"""
+        try:
+            for item in items:
+                self.tick()
+                yield item
+        finally:
+            close = getattr(items, "close", None)
+            if close: close()
+
+class JobRunner:
+    def __init__(self, workers=1, cache_bytes=64 * 1024 * 1024):
+        self.results = BytesLRU(cache_bytes)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._active = {}  # key → Job ที่ยังไม่เสร็จ
+        self._lock = threading.Lock()
+
+    def get(self, key, total=0):
+        """Job ที่เสร็จแล้วจาก cache (เช่น session อื่นสร้างไว้) — ยังไม่มี/ยังไม่เสร็จคืน None
+        งานที่ยังทำอยู่ไม่คืนให้ เพราะการรองานต้องนับ watchers ผ่าน submit()
+        """
+        data = self.results.get(key)
+        if data is None:
+            return None
+        job = Job(key, total); job.status = DONE; job.result = data; job.done = total
+        return job
+
+    def submit(self, key, func, total, *args):
+        """ส่ง func(job, *args) เข้าคิว (func คืน bytes) — key ซ้ำกับงานที่ค้างอยู่หรือเสร็จแล้วได้ Job เดิม"""
+        with self._lock:
+            job = self._active.get(key)
+            if job is None or job.cancelled:  # งานที่ถูกยกเลิกแต่ยังไม่หยุด → เริ่มงานใหม่แทนที่ (_run ลบเฉพาะงานของตัวเอง)
+                done = self.get(key, total)
+                if done is not None:
+                    return done
+                job = self._active[key] = Job(key, total)
+                self._pool.submit(self._run, job, func, args)
+            job.watchers += 1
+            return job
+
+    def cancel(self, job):
+        with self._lock:
+            job.watchers -= 1
+            if job.watchers <= 0:
+                job._cancel.set()
+
+    def _run(self, job, func, args):
+        t0 = time.perf_counter()
+        try:
+            if job._cancel.is_set():
+                raise JobCancelled()
+            job.status = RUNNING
+            job.result = func(job, *args)
+            self.results.put(job.key, job.result)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.seconds = time.perf_counter() - t0
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
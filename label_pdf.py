@@ -0,0 +1,151 @@
+# label_pdf.py
+"""
+Label sheet layout shared by build_pages_and_qr.py and the dashboard.
+Labels are streamed straight into the reportlab canvas one at a time,
+so nothing is written to disk and only one image is held in memory.
+
+Sheets are described by named profiles (PROFILES: the original A4 3x8 grid,
+Avery-style sheets and thermal roll labels). The position and size of every slot
+on a page is computed once per profile and label size (slot_table), so placing a
+label is a table lookup; start_at skips slots already used on a partly used sheet.
+
+vector=True draws the QR module matrix as filled rectangles and the captions
+as PDF text instead of embedding a bitmap per label.
+"""
+import io
+from collections import namedtuple
+from functools import lru_cache
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from qr_render import dark_runs
+
+# สัดส่วนเดียวกับ qr_render.draw_label_under (หน่วย px ที่ box_size=10)
+BOX_PX = 10
+LABEL_PX = 64
+
+# หน่วย mm: ขนาดกระดาษ, จำนวนช่อง, ขอบซ้าย/บนถึงช่องแรก, ขนาดช่อง, ระยะจากช่องถึงช่องถัดไป,
+# ขนาด label สูงสุด (0 = เต็มช่อง) และระยะเว้นในช่อง
+LabelProfile = namedtuple("LabelProfile",
+                          "title page_w page_h cols rows left top label_w label_h pitch_x pitch_y max_w max_h pad")
+
+PROFILES = {
+    # ตารางเดิม: A4 ขอบ 10/12 มม. แบ่ง 3x8 (label ไม่เกิน 42x52 มม. แต่ต้องไม่ล้นช่อง)
+    "a4-3x8": LabelProfile("A4 3×8", 210, 297, 3, 8, 10, 12, 190 / 3, 273 / 8, 190 / 3, 273 / 8, 42, 52, 1),
+    "avery-l7160": LabelProfile("Avery L7160 (A4 3×7, 63.5×38.1 มม.)", 210, 297, 3, 7, 7.2, 15.1,
+                                63.5, 38.1, 66.0, 38.1, 0, 0, 1.5),
+    "avery-l7651": LabelProfile("Avery L7651 (A4 5×13, 38.1×21.2 มม.)", 210, 297, 5, 13, 4.7, 10.7,
+                                38.1, 21.2, 40.6, 21.2, 0, 0, 1),
+    "avery-5160": LabelProfile("Avery 5160 (Letter 3×10, 2.625×1 นิ้ว)", 215.9, 279.4, 3, 10, 4.8, 12.7,
+                               66.7, 25.4, 69.9, 25.4, 0, 0, 1),
+    # ม้วนเครื่องพิมพ์ความร้อน: หนึ่ง label ต่อหน้า ขนาดหน้าเท่าขนาด label
+    "thermal-50x30": LabelProfile("Thermal 50×30 มม.", 50, 30, 1, 1, 0, 0, 50, 30, 50, 30, 0, 0, 1.5),
+    "thermal-40x50": LabelProfile("Thermal 40×50 มม.", 40, 50, 1, 1, 0, 0, 40, 50, 40, 50, 0, 0, 2),
+}
+DEFAULT_PROFILE = "a4-3x8"
+
+def _image_reader(item) -> ImageReader:
+    """รับได้ทั้ง PIL Image, bytes ของ PNG/WebP หรือ path — เปิดครั้งเดียวแล้วใช้ทั้งอ่านขนาดและวาด"""
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        item = io.BytesIO(item)
+    return ImageReader(item)
+
+_fonts = None
+
+def _label_fonts():
+    """(ตัวปกติ, ตัวหนา) — ใช้ DejaVu แบบเดียวกับ PNG ถ้าหาไม่เจอใช้ Helvetica"""
+    global _fonts
+    if _fonts is None:
+        try:
+            pdfmetrics.registerFont(TTFont("DejaVuSans", "DejaVuSans.ttf"))
+            pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", "DejaVuSans-Bold.ttf"))
+            _fonts = ("DejaVuSans", "DejaVuSans-Bold")
+        except Exception:
+            _fonts = ("Helvetica", "Helvetica-Bold")
+    return _fonts
+
+def _fit_text(c, text, font, size, x_mid, y, max_w):
+    """วาดข้อความกึ่งกลาง ย่อขนาดฟอนต์ถ้ากว้างเกิน label"""
+    tw = pdfmetrics.stringWidth(text, font, size)
+    if tw > max_w: size = size * max_w / tw
+    c.setFont(font, size)
+    c.drawCentredString(x_mid, y, text)
+
+def draw_vector_label(c, matrix, top_text, bottom_text, x, y, w, h):
+    """วาด QR (matrix รวมขอบ) + คำบรรยายในกรอบ (x, y, w, h) — module ต่อกันในแถวเดียวรวมเป็นสี่เหลี่ยมเดียว"""
+    n = len(matrix)
+    m = w / n  # ขนาด module (pt)
+    qr_top = y + h
+    c.setFillColorRGB(1, 1, 1)  # พื้นขาวทึบเหมือน PNG
+    c.rect(x, y, w, h, stroke=0, fill=1)
+    p = c.beginPath()
+    for r, start, run in dark_runs(matrix):
+        p.rect(x + start * m, qr_top - (r + 1) * m, run * m, m)
+    c.setFillColorRGB(0, 0, 0)
+    c.drawPath(p, stroke=0, fill=1)
+    if not (top_text or bottom_text):
+        return
+    px = m / BOX_PX  # 1 px ของ PNG เท่ากับกี่ pt
+    font, font_b = _label_fonts()
+    base_top = qr_top - w - (6 + 16) * px
+    _fit_text(c, top_text, font_b, 20 * px, x + w / 2, base_top, w)
+    if bottom_text:
+        _fit_text(c, bottom_text, font, 18 * px, x + w / 2, base_top - 22 * px, w)
+
+@lru_cache(maxsize=None)
+def slot_table(profile, iw, ih):
+    """ตำแหน่ง (x, y, w, h) หน่วย pt ของ label ขนาด iw×ih px ในทุกช่องของหนึ่งหน้า (เรียงซ้าย→ขวา บน→ล่าง)
+    คำนวณครั้งเดียวต่อ (profile, ขนาด label) — ย่อให้พอดีช่อง (หักขอบ pad) คงสัดส่วน แล้ววางกึ่งกลางช่อง
+    """
+    p = PROFILES[profile]
+    avail_w = min(p.label_w - 2 * p.pad, p.max_w or p.label_w)
+    avail_h = min(p.label_h - 2 * p.pad, p.max_h or p.label_h)
+    w = avail_w; h = w * ih / iw
+    if h > avail_h: h = avail_h; w = h * iw / ih
+    slots = []
+    for r in range(p.rows):
+        for col in range(p.cols):
+            x0 = p.left + col * p.pitch_x
+            y0 = p.page_h - p.top - r * p.pitch_y - p.label_h
+            slots.append(((x0 + (p.label_w - w) / 2) * mm, (y0 + (p.label_h - h) / 2) * mm, w * mm, h * mm))
+    return tuple(slots)
+
+def layout_qr_pdf(images, pdf_out, vector=False, profile=DEFAULT_PROFILE, start_at=0):
+    """วาง label ลงแผ่นสติ๊กเกอร์ตาม profile (ดู PROFILES) ตามลำดับ images — images เป็น iterable/generator ได้
+    vector=False: แต่ละชิ้นเป็น PIL Image, bytes ของ PNG/WebP หรือ path
+    vector=True:  แต่ละชิ้นเป็น (matrix, top_text, bottom_text) จาก qr_render.qr_matrix
+    start_at = จำนวนช่องที่ใช้ไปแล้วบนแผ่นแรก (พิมพ์ต่อบนแผ่นที่เหลือครึ่งแผ่น)
+    pdf_out เป็น path หรือ file-like (BytesIO จะถูก seek(0) ให้หลังเขียนเสร็จ)
+    คืนจำนวน label ที่วาง
+    """
+    p = PROFILES[profile]
+    per_page = p.cols * p.rows
+    if not 0 <= start_at < per_page:
+        raise ValueError(f"start_at ต้องอยู่ระหว่าง 0 ถึง {per_page - 1} สำหรับ {profile}")
+    c = canvas.Canvas(pdf_out, pagesize=(p.page_w * mm, p.page_h * mm))
+    tables = {}  # (iw, ih) → slot_table — QR ส่วนใหญ่ขนาดเท่ากันทั้งชุด
+    slot, n = start_at, 0
+    for item in images:
+        if n and slot == 0: c.showPage()
+        if vector:
+            matrix, top_text, bottom_text = item
+            iw = len(matrix) * BOX_PX
+            size = (iw, iw + (LABEL_PX if (top_text or bottom_text) else 0))
+        else:
+            img = _image_reader(item)
+            size = img.getSize()
+        table = tables.get(size)
+        if table is None:
+            table = tables[size] = slot_table(profile, *size)
+        x, y, w, h = table[slot]
+        if vector:
+            draw_vector_label(c, matrix, top_text, bottom_text, x, y, w, h)
+        else:
+            c.drawImage(img, x, y, width=w, height=h)
+        n += 1
+        slot = (slot + 1) % per_page
+    c.save()
+    if hasattr(pdf_out, "seek"): pdf_out.seek(0)
+    return n
@@ -0,0 +1,120 @@
+# page_render.py
+"""
+Per-asset HTML page renderer.
+
+PageRenderer works out the field order and pre-escapes the header labels once
+per sheet, splits the page skeleton into fixed fragments once, then renders
+every asset with a single "".join over pre-escaped column arrays taken from the
+DataFrame (no iterrows, no per-cell pd.isna). render_page keeps the old
+(title, [(label, value)]) signature for one-off pages and produces the same HTML.
+"""
+import html
+import pandas as pd
+
+# ลำดับฟิลด์ที่แสดงบนหน้า (คอลัมน์อื่นต่อท้ายตามลำดับใน Excel)
+PREFER = ["ลำดับ","ชื่อ","รหัสเครื่องมือห้องปฏิบัติการ","AssetID","ปี","ยี่ห้อ","โมเดล","หมายเลขเครื่อง",
+          "ต้นทุนต่อหน่วย","สถานะ","สถานที่ใช้งาน (ปัจจุบัน)","ผู้รับผิดชอบ (ปัจจุบัน)","รูปภาพ","QR Code","_qr_image_path"]
+
+_CDN_HEAD = """<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet">
+    <style>
+      body{background:#f8fafc}
+      .card{max-width:880px;margin:32px auto;border-radius:16px;box-shadow:0 6px 24px rgba(0,0,0,.06)}
+      .card-header{background:#0d6efd;color:white;border-top-left-radius:16px;border-top-right-radius:16px}
+      .col-form-label{color:#334155}
+      .form-control[readonly]{background:#fff}
+    </style>"""
+
+# โครงหน้า: _DOC_HEAD + title + _DOC_MID(head) + แถวฟอร์ม + _DOC_TAIL
+_DOC_HEAD = """<!doctype html>
+<html lang="th">
+  <head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>"""
+_DOC_MID = """</title>
+    {head}
+  </head>
+  <body>
+    <div class="card">
+      <div class="card-header">
+        <h4 class="m-0">ข้อมูลเครื่องมือห้องปฏิบัติการ</h4>
+      </div>
+      <div class="card-body">
+        """
+_DOC_TAIL = """
+        <div class="mt-4 text-center text-muted">© Smart Asset — QR Detail Page</div>
+      </div>
+    </div>
+  </body>
+</html>"""
+_FIELD_OPEN = """
+        <div class="mb-3 row">
+          <label class="col-sm-3 col-form-label fw-semibold">{label}</label>
+          <div class="col-sm-9">
+            <input type="text" class="form-control" value=\""""
+_FIELD_CLOSE = """" readonly>
+          </div>
+        </div>"""
+
+def field_order(columns, prefer=PREFER):
+    """คอลัมน์ใน prefer ก่อน (ตามลำดับ prefer) แล้วต่อด้วยคอลัมน์ที่เหลือตามลำดับเดิม"""
+    cols = list(columns)
+    present = set(cols)
+    first = [k for k in prefer if k in present]
+    used = set(first)
+    return first + [k for k in cols if k not in used]
+
+def escape_value(val) -> str:
+    return "" if (pd.isna(val) or str(val).lower()=="nan") else html.escape(str(val))
+
+def escape_column(values) -> list:
+    """escape ทั้งคอลัมน์ครั้งเดียว — ค่าว่าง/NaN/"nan" เป็นสตริงว่างเหมือน render_page"""
+    s = pd.Series(values, dtype=object)
+    na = s.isna().to_numpy()
+    out = []
+    for v, missing in zip(s.tolist(), na):
+        if missing:
+            out.append("")
+        else:
+            t = str(v)
+            out.append("" if t.lower() == "nan" else html.escape(t))
+    return out
+
+def _head(css_href):
+    """css_href=None ใช้ Bootstrap จาก CDN + style ในหน้า (แบบเดิม), ไม่งั้นลิงก์ไปไฟล์ CSS ในเครื่อง"""
+    if css_href:
+        return f'''<link href="{html.escape(css_href)}" rel="stylesheet">'''
+    return _CDN_HEAD
+
+class PageRenderer:
+    """เตรียมแม่แบบหน้าครั้งเดียวต่อชุดคอลัมน์ แล้ว render ได้ทุกแถวด้วย join เดียว"""
+    def __init__(self, columns, prefer=PREFER, css_href=None):
+        self.order = field_order(columns, prefer)
+        self._mid = _DOC_MID.format(head=_head(css_href))
+        # ชิ้นส่วนคงที่ก่อนค่าของแต่ละฟิลด์ (ปิดฟิลด์ก่อนหน้า + เปิดฟิลด์นี้)
+        opens = [_FIELD_OPEN.format(label=html.escape(str(k))) for k in self.order]
+        self._seps = [opens[0]] + [_FIELD_CLOSE + o for o in opens[1:]] if opens else []
+        self._tail = (_FIELD_CLOSE if opens else "") + _DOC_TAIL
+
+    def render(self, title, values):
+        """values = ค่าที่ escape แล้ว เรียงตาม self.order"""
+        parts = [_DOC_HEAD, html.escape(title), self._mid]
+        for sep, v in zip(self._seps, values):
+            parts.append(sep); parts.append(v)
+        parts.append(self._tail)
+        return "".join(parts)
+
+    def escaped_columns(self, df):
+        """คอลัมน์ของ df ที่ escape แล้ว ตาม self.order"""
+        return [escape_column(df[k].to_numpy(dtype=object)) for k in self.order]
+
+    def render_frame(self, df, titles):
+        """yield HTML ของทุกแถวใน df ตามลำดับ (titles = ID ของแต่ละแถว)"""
+        for title, *values in zip(titles, *self.escaped_columns(df)):
+            yield self.render(title, values)
+
+def render_page(title, rows, css_href=None):
+    """หน้าเดียวจาก [(label, value)] — ผลเหมือน PageRenderer ทุกตัวอักษร"""
+    rows = list(rows)
+    r = PageRenderer([k for k, _ in rows], prefer=(), css_href=css_href)
+    return r.render(title, [escape_value(v) for _, v in rows])
@@ -1,15 +1,16 @@
 # pages/2_Smart_Asset_Dashboard.py
-import io, re
+import io, time
 from pathlib import Path
-import pandas as pd
 import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
-import qrcode
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
 from auth import require_login, logout_button
+from qr_render import cached_label_png, label_png_bytes, qr_matrix, imap_ordered, label_cache
+from label_pdf import layout_qr_pdf, PROFILES, DEFAULT_PROFILE
+from asset_data import load_assets, load_sources, find_sources, SOURCE_COL
+from asset_search import build_index
+from run_report import RunReport, load_report
+from job_runner import JobRunner, job_key, RUNNING, DONE, CANCELLED, FAILED
+from page_render import PageRenderer
+from zip_export import zip_bytes
 
 # ต้องล็อกอินก่อนเข้าหน้านี้
 require_login()
@@ -18,84 +19,109 @@ st.set_page_config(page_title="Smart Asset Dashboard + QR", page_icon="🧾", la
 EXCEL_PATH = "Smart Asset Lab.xlsx"
 OUT_DIR = Path("SmartAsset_QR_Pages")
 DEFAULT_BASE_URL = "https://copteryokky.github.io/SmartAsset_QR_Package/pages/"
+POLL_SECONDS = 0.5  # ความถี่อัปเดตแถบความคืบหน้าของงาน PDF/ZIP
 
-ID_PRIORITY = ["รหัสเครื่องมือห้องปฏิบัติการ","AssetID","รหัส","รหัสครุภัณฑ์","Code","ID","Asset Id","Asset_ID"]
 PREFERRED_COLS = [
     "รหัสเครื่องมือห้องปฏิบัติการ", "AssetID", "ชื่อ", "ปี", "ยี่ห้อ", "โมเดล", "หมายเลขเครื่อง",
-    "ต้นทุนต่อหน่วย", "สถานะ", "สถานที่ใช้งาน (ปัจจุบัน)", "ผู้รับผิดชอบ (ปัจจุบัน)"
+    "ต้นทุนต่อหน่วย", "สถานะ", "สถานที่ใช้งาน (ปัจจุบัน)", "ผู้รับผิดชอบ (ปัจจุบัน)", SOURCE_COL
 ]
 
-def slugify(s: str) -> str:
-    s = str(s or "").strip()
-    s = re.sub(r"[^\w\-]+", "-", s, flags=re.UNICODE)
-    s = re.sub(r"-+", "-", s).strip("-")
-    return s or "item"
-
-def pick_id(row: pd.Series) -> str:
-    for k in ID_PRIORITY:
-        if k in row.index and pd.notna(row[k]) and str(row[k]).strip():
-            return str(row[k])
-    return f"ROW-{int(row.name)+1}"
-
-def make_qr_img(url: str, box_size=10, border=4) -> Image.Image:
-    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M,
-                       box_size=box_size, border=border)
-    qr.add_data(url); qr.make(fit=True)
-    return qr.make_image(fill_color="black", back_color="white").convert("RGB")
-
-def draw_label_under(qr_img: Image.Image, top_text: str, bottom_text: str = "") -> Image.Image:
-    W, H = qr_img.size
-    label_h = 64
-    out = Image.new("RGB", (W, H + label_h), "white")
-    out.paste(qr_img, (0, 0))
-    draw = ImageDraw.Draw(out)
-    try:
-        font = ImageFont.truetype("DejaVuSans.ttf", 18)
-        font_b = ImageFont.truetype("DejaVuSans-Bold.ttf", 20)
-    except:
-        font = ImageFont.load_default(); font_b = ImageFont.load_default()
-    def text_wh(text, font):
-        if not text: return 0,0
-        x0,y0,x1,y1 = draw.textbbox((0,0), text, font=font)
-        return (x1-x0, y1-y0)
-    tw, th = text_wh(top_text, font_b)
-    draw.text(((W - tw)//2, H + 6), top_text, fill="black", font=font_b)
-    if bottom_text:
-        bw, bh = text_wh(bottom_text, font)
-        draw.text(((W - bw)//2, H + 6 + th + 2), bottom_text, fill="black", font=font)
-    return out
-
-def layout_qr_pdf(png_paths, pdf_bytes_io):
-    page_w, page_h = A4
-    c = canvas.Canvas(pdf_bytes_io, pagesize=A4)
-    left, right, top, bottom = 10*mm, 10*mm, 12*mm, 12*mm
-    cols, rows = 3, 8
-    usable_w = page_w - left - right
-    usable_h = page_h - top - bottom
-    cell_w = usable_w / cols; cell_h = usable_h / rows
-    for i, p in enumerate(png_paths):
-        if i and i % (cols*rows) == 0: c.showPage()
-        r = (i % (cols*rows)) // cols; cidx = (i % cols)
-        x0 = left + cidx * cell_w; y0 = bottom + (rows - 1 - r) * cell_h
-        im = Image.open(p)
-        iw, ih = im.size
-        target_w, target_h = 42*mm, 52*mm
-        aspect = iw/ih
-        w, h = target_w, target_w/aspect
-        if h > target_h: h = target_h; w = target_h*aspect
-        x = x0 + (cell_w - w)/2; y = y0 + (cell_h - h)/2
-        c.drawImage(ImageReader(im), x, y, width=w, height=h, preserveAspectRatio=True)
-    c.save(); pdf_bytes_io.seek(0)
+@st.cache_data(show_spinner="กำลังโหลดข้อมูล...")
+def load_dataset(path: str, mtime_ns: int, all_sheets: bool = False):
+    # mtime_ns เป็นส่วนหนึ่งของ key → ไฟล์ Excel เปลี่ยนเมื่อไหร่ค่อยโหลดใหม่
+    if all_sheets:  # ทุกแผ่นงาน (แผนกละแผ่น) อ่านแบบ stream แล้วรวม พร้อมคอลัมน์แผ่นงานต้นทาง
+        return load_sources(find_sources([path], all_sheets=True))
+    return load_assets(path)
+
+@st.cache_resource(show_spinner=False)
+def search_index(version: str, _data):
+    # สร้าง index ครั้งเดียวต่อเวอร์ชันข้อมูล ใช้ร่วมกันทุก session
+    return build_index(_data)
+
+@st.cache_resource(show_spinner=False)
+def job_runner():
+    # คิวงานเดียวทั้งเซิร์ฟเวอร์: ทำทีละงาน (แต่ละงานใช้ process pool ทุกคอร์อยู่แล้ว) + cache PDF ที่เสร็จแล้ว
+    return JobRunner(workers=1)
+
+def make_label_pdf(job, tasks, vector, jobs, profile=DEFAULT_PROFILE, start_at=0):
+    """งานเบื้องหลัง: tasks = [(url, รหัส, ชื่อ)] → bytes ของ PDF ตามแผ่นสติ๊กเกอร์ profile"""
+    pdf = io.BytesIO()
+    if vector:
+        matrices = job.track(imap_ordered(qr_matrix, [(u,) for u, _, _ in tasks], jobs=jobs))
+        layout_qr_pdf(((m, t, b) for m, (_, t, b) in zip(matrices, tasks)), pdf, vector=True,
+                      profile=profile, start_at=start_at)
+    else:
+        layout_qr_pdf(job.track(imap_ordered(label_png_bytes, tasks, jobs=jobs)), pdf,
+                      profile=profile, start_at=start_at)
+    return pdf.getvalue()
+
+def make_label_zip(job, names, tasks, frame, jobs):
+    """งานเบื้องหลัง: png/<slug>.png ป้ายทุกรายการ (+ pages/<slug>.html ถ้าให้ frame มา) → bytes ของ ZIP"""
+    pngs = job.track(imap_ordered(label_png_bytes, tasks, jobs=jobs))
+    pages = PageRenderer(frame.columns).render_frame(frame, [t[1] for t in tasks]) if frame is not None else None
+    def files():
+        for slug, png in zip(names, pngs):
+            yield f"png/{slug}.png", png
+            if pages is not None:
+                yield f"pages/{slug}.html", next(pages)
+    return zip_bytes(files())
+
+def session_job(name, key):
+    """งาน name ("pdf"/"zip") ของ session นี้ ถ้ายังตรงกับ key ปัจจุบัน ไม่มีก็ใช้ผลที่เสร็จแล้วใน cache
+    (session อื่นสร้างไว้ → ดาวน์โหลดได้เลยไม่ต้องกดสร้าง)
+    ตัวกรองเปลี่ยนแล้วได้งานของ key ใหม่ — งานเดิมยังทำต่อในเบื้องหลัง (และเข้า cache) ได้
+    """
+    job = st.session_state.get(f"{name}_job")
+    if job is not None and job.key == key:
+        return job
+    return job_runner().get(key)
+
+def show_progress(name, key):
+    """แถบความคืบหน้า + ปุ่มยกเลิกของงาน key — เป็น st.fragment จึง rerun เฉพาะส่วนนี้ทุก POLL_SECONDS
+    งานจบ/ถูกยกเลิกแล้ว → rerun ทั้งหน้าครั้งเดียวให้ปุ่มสร้างและปุ่มดาวน์โหลดอัปเดต
+    """
+    job = session_job(name, key)
+    if job is None or not job.active:
+        st.rerun()
+    st.progress(job.progress, text=f"กำลังสร้าง {name.upper()}... {job.done}/{job.total}"
+                if job.status == RUNNING else "รอคิว...")
+    if st.button("ยกเลิก", key=f"{name}_cancel"):
+        job_runner().cancel(job)
+        st.session_state.pop(f"{name}_job", None)
+        st.rerun()
+
+# Streamlit รุ่นที่ไม่มี st.fragment: วาดครั้งเดียว แล้วท้ายสคริปต์ rerun ทั้งหน้าแทน
+progress_panel = st.fragment(show_progress, run_every=POLL_SECONDS) if hasattr(st, "fragment") else show_progress
+
+def show_job(name, job, label, file_name, mime):
+    """แถบความคืบหน้า + ปุ่มยกเลิกระหว่างทำ, ปุ่มดาวน์โหลดเมื่อเสร็จ"""
+    what = name.upper()
+    if job.active:
+        progress_panel(name, job.key)
+    elif job.status == DONE:
+        perf.count(f"{name}_bytes", len(job.result))
+        if job.seconds is not None:
+            st.caption(f"{job.total} รายการ • {job.seconds:.1f}s")
+        st.download_button(label, data=job.result, file_name=file_name, mime=mime)
+    elif job.status == CANCELLED:
+        st.info(f"ยกเลิกการสร้าง {what} แล้ว")
+    elif job.status == FAILED:
+        st.error(f"สร้าง {what} ไม่สำเร็จ: {job.error}")
 
 # ====== UI ======
 st.title("Smart Asset Dashboard + QR")
-st.caption("ค้นหา ดู QR พรีวิว ดาวน์โหลด PNG และสร้าง PDF รวม QR (A4 3×8) • สแกนแล้วไปยังหน้าออนไลน์ตาม BASE_URL")
+st.caption("ค้นหา ดู QR พรีวิว ดาวน์โหลด PNG และสร้าง PDF รวม QR (A4 3×8, Avery, thermal) • สแกนแล้วไปยังหน้าออนไลน์ตาม BASE_URL")
 
 if not Path(EXCEL_PATH).exists():
     st.error(f"ไม่พบไฟล์ Excel: {EXCEL_PATH}")
     st.stop()
 
-df = pd.read_excel(EXCEL_PATH, sheet_name=0).dropna(how="all").reset_index(drop=True)
+perf = RunReport("dashboard")  # เวลาแต่ละขั้นของการรันสคริปต์รอบนี้ (แสดงในแผง performance)
+all_sheets = st.sidebar.checkbox("อ่านทุกแผ่นงานในไฟล์ Excel", value=False,
+                                 help="ค่าเริ่มต้นอ่านเฉพาะแผ่นแรก — เปิดเมื่อแยกแผ่นตามแผนก")
+with perf.stage("load"):
+    data = load_dataset(EXCEL_PATH, Path(EXCEL_PATH).stat().st_mtime_ns, all_sheets)
+df, ids, slugs = data.df, data.ids, data.slugs  # ID/slug ชุดเดียวกับที่ builder ใช้ตั้งชื่อไฟล์
 all_cols = df.columns.tolist()
 
 with st.sidebar:
@@ -108,16 +134,15 @@ with st.sidebar:
     base_url = st.text_input("BASE_URL", value=DEFAULT_BASE_URL, help="ลงท้ายด้วย /")
     if not base_url.endswith("/"):
         st.warning("BASE_URL ควรลงท้ายด้วย '/'", icon="⚠️")
+    jobs = st.number_input("จำนวน process สร้าง QR (0 = ทุกคอร์)", min_value=0, value=0, step=1)
 
-# filter
+# filter (เรียงตามความตรง: รหัสตรงตัว > ขึ้นต้นรหัส > ขึ้นต้นคำ > มีคำนี้อยู่ในแถว)
 if q and q.strip():
-    mask = pd.Series(False, index=df.index)
-    qlow = q.strip().lower()
-    for c in all_cols:
-        mask |= df[c].astype(str).str.lower().str.contains(qlow, na=False)
-    view = df[mask].copy()
+    with perf.stage("search"):
+        hits = search_index(data.version, data).search(q)
+        view = df.loc[[label for label, _ in hits]]
 else:
-    view = df.copy()
+    view = df
 
 st.subheader("ตารางรายการ")
 st.dataframe(view[show_cols] if show_cols else view, use_container_width=True, height=320)
@@ -127,40 +152,79 @@ colL, colR = st.columns([1,1])
 
 with colL:
     label_col = "ชื่อ" if "ชื่อ" in all_cols else (show_cols[0] if show_cols else all_cols[0])
-    options = [(f"{row.get(label_col,'')} · [{pick_id(row)}]", i) for i, row in view.iterrows()]
+    options = [(f"{row.get(label_col,'')} · [{ids[i]}]", i) for i, row in view.iterrows()]
     if not options:
         st.info("ไม่พบรายการ")
     else:
         sel = st.selectbox("เลือกรายการ", options=options, format_func=lambda x: x[0])
         _, idx = sel
         row = view.loc[idx]
-        rid = pick_id(row); slug = slugify(rid)
+        rid = ids[idx]; slug = slugs[idx]
         title_txt = str(row.get("ชื่อ","")) if "ชื่อ" in row.index else ""
         url = f"{base_url}{slug}.html"
         st.write(f"**ลิงก์ปลายทาง:** {url}")
-        qr = make_qr_img(url, box_size=10, border=4)
-        qr_labeled = draw_label_under(qr, top_text=rid, bottom_text=title_txt)
-        st.image(qr_labeled, caption="QR + ป้ายกำกับ", use_column_width=False)
-        buf = io.BytesIO(); qr_labeled.save(buf, "PNG"); buf.seek(0)
-        st.download_button("ดาวน์โหลด PNG ของรายการนี้", data=buf.getvalue(),
+        with perf.stage("preview"):
+            png = cached_label_png(url, top_text=rid, bottom_text=title_txt, box_size=10, border=4)
+        st.image(png, caption="QR + ป้ายกำกับ", use_column_width=False)
+        st.download_button("ดาวน์โหลด PNG ของรายการนี้", data=png,
                            file_name=f"{slug}.png", mime="image/png")
 
 with colR:
-    st.markdown("### สร้าง PDF รวม QR (A4 3×8)")
-    if st.button("สร้าง PDF และดาวน์โหลด"):
-        tmp = OUT_DIR / "qrcodes_tmp"; tmp.mkdir(parents=True, exist_ok=True)
-        pngs = []
-        for _, r in view.iterrows():
-            rid2 = pick_id(r); slug2 = slugify(rid2)
-            url2 = f"{base_url}{slug2}.html"
-            title2 = str(r.get("ชื่อ","")) if "ชื่อ" in r.index else ""
-            img = draw_label_under(make_qr_img(url2), top_text=rid2, bottom_text=title2)
-            p = tmp / f"{slug2}.png"; img.save(p.as_posix(), "PNG"); pngs.append(p.as_posix())
-        pdf = io.BytesIO(); layout_qr_pdf(pngs, pdf)
-        for p in pngs: Path(p).unlink(missing_ok=True)
-        try: tmp.rmdir()
-        except: pass
-        st.download_button("ดาวน์โหลดไฟล์ PDF (A4 3×8)", data=pdf.getvalue(),
-                           file_name="qr_labels_A4.pdf", mime="application/pdf")
+    st.markdown("### สร้าง PDF รวม QR")
+    layout = st.selectbox("แผ่นสติ๊กเกอร์", options=list(PROFILES), format_func=lambda k: PROFILES[k].title)
+    per_sheet = PROFILES[layout].cols * PROFILES[layout].rows
+    start_at = 0
+    if per_sheet > 1:
+        start_at = st.number_input("ข้ามช่องที่ใช้ไปแล้วบนแผ่นแรก", min_value=0, max_value=per_sheet - 1,
+                                   value=0, step=1)
+    vector_pdf = st.checkbox("PDF แบบเวกเตอร์ (ไฟล์เล็ก คมชัดทุกขนาดพิมพ์)", value=True)
+    runner = job_runner()
+    view_slugs = slugs.loc[view.index].tolist()
+    names = view["ชื่อ"].map(str) if "ชื่อ" in view.columns else [""] * len(view)
+    def label_tasks():
+        return [(f"{base_url}{s}.html", i, t) for s, i, t in zip(view_slugs, ids.loc[view.index], names)]
+    # PDF เดียวกัน = ข้อมูลเวอร์ชันเดียวกัน + BASE_URL + ชุดรายการที่กรอง + ชนิด PDF
+    pdf_key = job_key("pdf", data.version, base_url, vector_pdf, layout, int(start_at), view_slugs)
+    pdf_job = session_job("pdf", pdf_key)
+    if st.button("สร้าง PDF และดาวน์โหลด", disabled=bool(pdf_job and pdf_job.active)):
+        tasks = label_tasks()
+        # เข้ารหัส QR (+ วาดป้าย) แบบขนานในเบื้องหลัง แล้วส่งเข้า PDF ทีละใบในหน่วยความจำ
+        pdf_job = st.session_state["pdf_job"] = runner.submit(pdf_key, make_label_pdf, len(tasks), tasks,
+                                                              vector_pdf, int(jobs), layout, int(start_at))
+    if pdf_job is not None:
+        show_job("pdf", pdf_job, f"ดาวน์โหลดไฟล์ PDF ({PROFILES[layout].title})", f"qr_labels_{layout}.pdf",
+                 "application/pdf")
+
+    st.markdown("### ส่งออก ZIP (PNG ป้ายทุกรายการที่กรอง)")
+    with_html = st.checkbox("รวมหน้า HTML ของแต่ละรายการ (pages/<slug>.html)", value=False)
+    zip_key = job_key("zip", data.version, base_url, with_html, view_slugs)
+    zip_job = session_job("zip", zip_key)
+    if st.button("สร้าง ZIP และดาวน์โหลด", disabled=bool(zip_job and zip_job.active)):
+        tasks = label_tasks()
+        zip_job = st.session_state["zip_job"] = runner.submit(zip_key, make_label_zip, len(tasks), view_slugs,
+                                                              tasks, view if with_html else None, int(jobs))
+    if zip_job is not None:
+        show_job("zip", zip_job, "ดาวน์โหลดไฟล์ ZIP", "qr_labels.zip", "application/zip")
+
+with st.expander("performance"):
+    perf.count("rows", len(df)); perf.count("rows_shown", len(view))
+    perf.count("label_cache_items", len(label_cache)); perf.count("label_cache_bytes", label_cache.size)
+    st.write("**รอบนี้ (dashboard)**")
+    st.dataframe([{"stage": k, "ms": round(v["seconds"] * 1000, 2)} for k, v in perf.stages.items()],
+                 use_container_width=True)
+    st.json(perf.counters, expanded=False)
+    last = load_report(OUT_DIR / "build_report.json")
+    if last:
+        st.write(f"**build ล่าสุด** ({last['started']}, รวม {last['total_seconds']:.2f}s)")
+        st.dataframe([{"stage": k, "s": v["seconds"]} for k, v in last["stages"].items()],
+                     use_container_width=True)
+        if last["slowest"]:
+            st.write("รายการที่ช้าที่สุด")
+            st.dataframe(last["slowest"], use_container_width=True)
 
 logout_button("sidebar")
+
+# ไม่มี st.fragment: งานของตัวกรองปัจจุบันยังไม่เสร็จ → วาดทั้งหน้าใหม่เป็นระยะเพื่ออัปเดตแถบความคืบหน้า
+if progress_panel is show_progress and any(j is not None and j.active for j in (pdf_job, zip_job)):
+    time.sleep(POLL_SECONDS)
+    st.rerun()
@@ -0,0 +1,216 @@
+# qr_render.py
+"""
+QR encode / label render helpers shared by build_pages_and_qr.py and the dashboard,
+plus a process-pool map that fans per-asset work out over all cores
+while returning results in input order.
+
+QR files can be written as 1-bit PNG (default), the old 24-bit RGB PNG, SVG or
+lossless WebP (see QR_FORMATS); all of them are rendered from the module matrix.
+"""
+import io, os, threading, multiprocessing
+from collections import deque, OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+# --- single asset ----------------------------------------------------------
+def _encode(url: str, box_size=10, border=4) -> qrcode.QRCode:
+    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M,
+                       box_size=box_size, border=border)
+    qr.add_data(url); qr.make(fit=True)
+    return qr
+
+def make_qr_img(url: str, box_size=10, border=4) -> Image.Image:
+    return matrix_image(qr_matrix(url, border=border), box_size).convert("RGB")
+
+def qr_matrix(url: str, border=4):
+    """เมทริกซ์ module ของ QR (รวมขอบ) เป็น list ของแถว bool — ใช้วาดแบบเวกเตอร์"""
+    return _encode(url, border=border).get_matrix()
+
+def qr_outputs(url: str, fmt="png", box_size=10, border=4):
+    """เข้ารหัสครั้งเดียว คืน (ไฟล์ QR ตาม fmt หรือ None ถ้า fmt=None, matrix) สำหรับ builder โหมดเวกเตอร์"""
+    matrix = qr_matrix(url, border=border)
+    return (matrix_bytes(matrix, fmt, box_size) if fmt else None), matrix
+
+# --- file formats ----------------------------------------------------------
+# รูปแบบไฟล์ QR → นามสกุล: png = ขาวดำ 1 บิต (optimize), png24 = RGB แบบเดิม, svg = เวกเตอร์, webp = lossless
+QR_FORMATS = {"png": ".png", "png24": ".png", "svg": ".svg", "webp": ".webp"}
+
+def dark_runs(matrix):
+    """yield (แถว, คอลัมน์เริ่ม, ความยาว) ของ module ดำที่ต่อกันในแต่ละแถว"""
+    for r, line in enumerate(matrix):
+        start = None
+        for col, dark in enumerate(line):
+            if dark and start is None:
+                start = col
+            elif not dark and start is not None:
+                yield r, start, col - start; start = None
+        if start is not None:
+            yield r, start, len(line) - start
+
+def matrix_image(matrix, box_size=10) -> Image.Image:
+    """รูปขาวดำ mode "1" จาก matrix — module ละ box_size px (พิกเซลเหมือน qrcode.make_image)"""
+    n = len(matrix)
+    img = Image.new("1", (n, n))
+    img.putdata([0 if dark else 255 for line in matrix for dark in line])
+    return img.resize((n * box_size, n * box_size), Image.NEAREST)
+
+def svg_bytes(matrix, box_size=10) -> bytes:
+    """SVG หนึ่ง path: ช่วง module ดำในแถวเป็นเส้นหนา 1 module (M แรกของแถว แล้วขยับด้วย m สัมพัทธ์)
+    viewBox หน่วย module, ขนาดแสดงผล box_size px/module
+    """
+    n = len(matrix); size = n * box_size
+    parts, row, end = [], None, 0
+    for r, c, w in dark_runs(matrix):
+        if r != row:
+            parts.append(f"M{c} {r}.5h{w}"); row = r
+        else:
+            parts.append(f"m{c - end} 0h{w}")
+        end = c + w
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+            f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+            f'<rect width="{n}" height="{n}" fill="#fff"/><path stroke="#000" d="{"".join(parts)}"/></svg>').encode("ascii")
+
+def matrix_bytes(matrix, fmt="png", box_size=10) -> bytes:
+    if fmt == "svg":
+        return svg_bytes(matrix, box_size)
+    img = matrix_image(matrix, box_size)
+    buf = io.BytesIO()
+    if fmt == "png":
+        img.save(buf, "PNG", optimize=True)
+    elif fmt == "png24":
+        img.convert("RGB").save(buf, "PNG")
+    elif fmt == "webp":
+        img.convert("L").save(buf, "WEBP", lossless=True)  # WebP ไม่มีโหมด 1 บิต
+    else:
+        raise ValueError(f"unknown QR format: {fmt}")
+    return buf.getvalue()
+
+def qr_bytes(url: str, fmt="png", box_size=10, border=4) -> bytes:
+    """ไฟล์ QR ล้วนตาม fmt (แบบที่ builder เขียนลง qrcodes/<slug><นามสกุล>)"""
+    return matrix_bytes(qr_matrix(url, border=border), fmt, box_size)
+
+@lru_cache(maxsize=None)
+def load_font(name: str, size: int):
+    """โหลดฟอนต์ครั้งเดียวต่อโปรเซส (ไม่เจอไฟล์ → ฟอนต์ default ของ PIL)"""
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        return ImageFont.load_default()
+
+def draw_label_under(qr_img: Image.Image, top_text: str, bottom_text: str = "") -> Image.Image:
+    W, H = qr_img.size
+    label_h = 64
+    out = Image.new("RGB", (W, H + label_h), "white")
+    out.paste(qr_img, (0, 0))
+    draw = ImageDraw.Draw(out)
+    font = load_font("DejaVuSans.ttf", 18)
+    font_b = load_font("DejaVuSans-Bold.ttf", 20)
+    def text_wh(text, font):
+        if not text: return 0,0
+        x0,y0,x1,y1 = draw.textbbox((0,0), text, font=font)
+        return (x1-x0, y1-y0)
+    tw, th = text_wh(top_text, font_b)
+    draw.text(((W - tw)//2, H + 6), top_text, fill="black", font=font_b)
+    if bottom_text:
+        bw, bh = text_wh(bottom_text, font)
+        draw.text(((W - bw)//2, H + 6 + th + 2), bottom_text, fill="black", font=font)
+    return out
+
+def png_bytes(img: Image.Image) -> bytes:
+    buf = io.BytesIO(); img.save(buf, "PNG")
+    return buf.getvalue()
+
+def label_png_bytes(url: str, top_text: str, bottom_text: str = "", box_size=10, border=4) -> bytes:
+    """QR + ป้ายกำกับด้านล่าง (แบบที่ dashboard ใช้)"""
+    return png_bytes(draw_label_under(make_qr_img(url, box_size=box_size, border=border),
+                                      top_text=top_text, bottom_text=bottom_text))
+
+# --- rendered label cache --------------------------------------------------
+class BytesLRU:
+    """LRU ของค่า bytes จำกัดขนาดรวมเป็นไบต์ (thread-safe — Streamlit รันแต่ละ session คนละ thread)"""
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            val = self._data.get(key)
+            if val is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return val
+
+    def put(self, key, val: bytes):
+        if len(val) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None: self.size -= len(old)
+            self._data[key] = val; self.size += len(val)
+            while self.size > self.max_bytes:
+                _, ev = self._data.popitem(last=False)
+                self.size -= len(ev)
+
+    def __len__(self):
+        return len(self._data)
+
+label_cache = BytesLRU()
+
+def cached_label_png(url: str, top_text: str, bottom_text: str = "", box_size=10, border=4) -> bytes:
+    """label_png_bytes ผ่าน LRU — พรีวิว/ดาวน์โหลดซ้ำไม่ต้องเข้ารหัสหรือวาดใหม่"""
+    key = (url, box_size, border, top_text, bottom_text)
+    data = label_cache.get(key)
+    if data is None:
+        data = label_png_bytes(url, top_text, bottom_text, box_size=box_size, border=border)
+        label_cache.put(key, data)
+    return data
+
+# --- worker pool -----------------------------------------------------------
+def resolve_jobs(jobs=None) -> int:
+    """None/0 = ใช้ทุกคอร์, ค่าติดลบ = ทุกคอร์ลบออก |jobs|"""
+    n = os.cpu_count() or 1
+    if not jobs:
+        return n
+    if jobs < 0:
+        return max(1, n + jobs)
+    return jobs
+
+def _pool_context():
+    """เรียกจาก thread อื่นที่ไม่ใช่ main (เช่น JobRunner ใน Streamlit) → ห้าม fork:
+    fork ตอนที่ thread อื่นถือ lock อยู่ทำให้ child ค้างได้ จึงใช้ forkserver (หรือ spawn ถ้าไม่มี)
+    ส่วน CLI เรียกจาก main thread ใช้ค่าเริ่มต้นของระบบ
+    """
+    if threading.current_thread() is threading.main_thread():
+        return None
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+def imap_ordered(func, tasks, jobs=None, prefetch=4):
+    """เรียก func(*task) กับทุก task แล้ว yield ผลทีละชิ้นตามลำดับ task เดิม
+    งานที่ค้างในคิวมีไม่เกิน jobs*prefetch ชิ้น หน่วยความจำจึงไม่โตตามจำนวนรายการ
+    jobs=1 ทำในโปรเซสเดียว (ไม่สร้าง pool) — func ต้องเป็นฟังก์ชันระดับโมดูลเพื่อให้ pickle ได้
+    """
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1:
+        for task in tasks:
+            yield func(*task)
+        return
+    ex = ProcessPoolExecutor(max_workers=jobs, mp_context=_pool_context())
+    pending = deque()
+    try:
+        for task in tasks:
+            pending.append(ex.submit(func, *task))
+            if len(pending) >= jobs * prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # ผู้เรียกหยุดกลางทาง (เช่น error) → ยกเลิกงานที่ยังไม่เริ่ม
+        ex.shutdown(wait=True, cancel_futures=True)
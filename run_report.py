@@ -0,0 +1,131 @@
+# run_report.py
+"""
+Timing instrumentation shared by build_pages_and_qr.py and the dashboard:
+per-stage timers, counters, per-asset timings with a slowest-N list, a JSON
+run report, and an optional cProfile / tracemalloc wrapper.
+"""
+import io, json, time, heapq, cProfile, pstats, tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+def timed_call(func, *args):
+    """เรียก func(*args) แล้วคืน (ผลลัพธ์, วินาที) — ระดับโมดูลเพื่อส่งเข้า process pool ได้"""
+    t0 = time.perf_counter()
+    out = func(*args)
+    return out, time.perf_counter() - t0
+
+class RunReport:
+    def __init__(self, name="build", slowest_n=10):
+        self.name = name
+        self.slowest_n = slowest_n
+        self.started = datetime.now()
+        self.stages = {}    # ชื่อ stage → {"seconds", "calls"}
+        self.counters = {}
+        self.assets = {}    # slug → {ชื่อ stage: วินาที}
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def timed(self, items, name):
+        """ส่ง items ต่อทีละชิ้น โดยนับเวลาที่ใช้ผลิตแต่ละชิ้น (เช่นอ่าน chunk ถัดไป) เข้า stage name"""
+        it = iter(items)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add_time(name, time.perf_counter() - t0)
+                return
+            self.add_time(name, time.perf_counter() - t0)
+            yield item
+
+    def add_time(self, name, seconds):
+        s = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        s["seconds"] += seconds; s["calls"] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def asset(self, slug, stage, seconds):
+        a = self.assets.setdefault(slug, {})
+        a[stage] = a.get(stage, 0.0) + seconds
+
+    def slowest(self, n=None):
+        n = self.slowest_n if n is None else n
+        top = heapq.nlargest(n, self.assets.items(), key=lambda kv: sum(kv[1].values()))
+        return [{"slug": slug, "seconds": round(sum(t.values()), 6),
+                 **{k: round(v, 6) for k, v in t.items()}} for slug, t in top]
+
+    def to_dict(self):
+        per_asset = {}
+        for t in self.assets.values():
+            for k, v in t.items():
+                per_asset[k] = per_asset.get(k, 0.0) + v
+        n = len(self.assets)
+        return {
+            "name": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "total_seconds": round(time.perf_counter() - self._t0, 6),
+            "stages": {k: {"seconds": round(v["seconds"], 6), "calls": v["calls"]} for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+            "assets": n,
+            "per_asset_mean_seconds": {k: round(v / n, 6) for k, v in per_asset.items()} if n else {},
+            "slowest": self.slowest(),
+        }
+
+    def save(self, path):
+        Path(path).write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=1), encoding="utf-8")
+
+def load_report(path):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+@contextmanager
+def profiled(mode, out_dir, name="build"):
+    """ครอบการรันด้วย cProfile (<name>_profile.prof + .txt) หรือ tracemalloc (<name>_tracemalloc.txt)
+    mode=None ไม่ทำอะไร — คืน path ของไฟล์หลักผ่าน list ที่ yield ออกไป
+    """
+    saved = []
+    if not mode:
+        yield saved
+        return
+    out_dir = Path(out_dir)
+    if mode == "cprofile":
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield saved
+        finally:
+            prof.disable()
+            path = out_dir / f"{name}_profile.prof"
+            prof.dump_stats(path.as_posix())
+            buf = io.StringIO()
+            pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(40)
+            Path(f"{path.with_suffix('')}.txt").write_text(buf.getvalue(), encoding="utf-8")
+            saved.append(path)
+    elif mode == "tracemalloc":
+        tracemalloc.start()  # 1 เฟรม: รายงานใช้ statistics("lineno") อยู่แล้ว เฟรมลึกกว่านี้ทำให้ช้าหลายสิบเท่า
+        try:
+            yield saved
+        finally:
+            snap = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [f"current={current/1e6:.1f} MB peak={peak/1e6:.1f} MB", ""]
+            lines += [str(s) for s in snap.statistics("lineno")[:40]]
+            path = out_dir / f"{name}_tracemalloc.txt"
+            path.write_text("\n".join(lines), encoding="utf-8")
+            saved.append(path)
+    else:
+        raise ValueError(f"unknown profile mode: {mode}")
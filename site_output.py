@@ -0,0 +1,120 @@
+# site_output.py
+"""
+Production output for the static pages (build_pages_and_qr.py --production):
+  - one local, content-hashed stylesheet (pages/assets/site.<hash>.css) instead of
+    the Bootstrap CDN link + inline <style> repeated in every page,
+  - precompressed .gz / .br siblings next to every text file (.br needs the
+    optional `brotli` package),
+  - index.html split into pages of PER_PAGE entries plus search-index.json for a
+    small client-side search box.
+"""
+import gzip, json, html, hashlib, re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # ไม่มี brotli ก็ยังได้ .gz
+    brotli = None
+
+ASSET_DIR = "assets"
+PER_PAGE = 200
+
+# เฉพาะ class ของ Bootstrap ที่ render_page ใช้ + style เดิมของหน้า
+SITE_CSS = """\
+*,::after,::before{box-sizing:border-box}
+body{margin:0;font-family:system-ui,-apple-system,"Segoe UI",Roboto,"Noto Sans Thai",Tahoma,sans-serif;font-size:1rem;line-height:1.5;color:#212529;background:#f8fafc}
+h2,h4{margin-top:0;font-weight:500;line-height:1.2}
+a{color:#0d6efd}
+.m-0{margin:0!important}.mb-3{margin-bottom:1rem!important}.mt-4{margin-top:1.5rem!important}
+.text-center{text-align:center!important}.text-muted{color:#6c757d!important}.fw-semibold{font-weight:600!important}
+.card{display:flex;flex-direction:column;background:#fff;border:1px solid rgba(0,0,0,.175);max-width:880px;margin:32px auto;border-radius:16px;box-shadow:0 6px 24px rgba(0,0,0,.06)}
+.card-header{padding:.5rem 1rem;background:#0d6efd;color:#fff;border-top-left-radius:16px;border-top-right-radius:16px}
+.card-body{padding:1rem}
+.row{display:flex;flex-wrap:wrap;margin:0 -.75rem}
+.row>*{width:100%;padding:0 .75rem}
+.col-form-label{padding-top:calc(.375rem + 1px);padding-bottom:calc(.375rem + 1px);color:#334155}
+.form-control{display:block;width:100%;padding:.375rem .75rem;font:inherit;color:#212529;background:#fff;border:1px solid #dee2e6;border-radius:.375rem}
+.form-control[readonly]{background:#fff}
+.pager{display:flex;flex-wrap:wrap;gap:.5rem;margin:1rem 0}
+@media (min-width:576px){.col-sm-3{flex:0 0 auto;width:25%}.col-sm-9{flex:0 0 auto;width:75%}}
+"""
+
+def write_precompressed(path, data: bytes):
+    """เขียน path.gz (และ path.br ถ้ามี brotli) — mtime=0 ให้ไฟล์เหมือนเดิมทุกครั้งที่เนื้อหาเท่าเดิม"""
+    path = Path(path)
+    Path(f"{path}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        Path(f"{path}.br").write_bytes(brotli.compress(data, quality=11))
+
+def remove_precompressed(path):
+    for ext in (".gz", ".br"):
+        Path(f"{path}{ext}").unlink(missing_ok=True)
+
+def write_text(path, text: str, compress=True):
+    data = text.encode("utf-8")
+    Path(path).write_bytes(data)
+    if compress:
+        write_precompressed(path, data)
+
+def write_site_css(pages_dir) -> str:
+    """เขียน assets/site.<hash>.css (ลบเวอร์ชันเก่า) แล้วคืน href ที่ใช้จากหน้าใน pages/"""
+    css_dir = Path(pages_dir) / ASSET_DIR
+    css_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256(SITE_CSS.encode("utf-8")).hexdigest()[:10]
+    name = f"site.{digest}.css"
+    for old in css_dir.glob("site.*.css*"):
+        if not old.name.startswith(name):
+            old.unlink()
+    write_text(css_dir / name, SITE_CSS)
+    return f"{ASSET_DIR}/{name}"
+
+def clean_production(pages_dir):
+    """ลบไฟล์ที่มีเฉพาะโหมด production (CSS, index หน้าอื่น, search-index.json, .gz/.br ของ index)"""
+    pages_dir = Path(pages_dir)
+    for old in list(pages_dir.glob("index-*.html*")) + list(pages_dir.glob("search-index.json*")) \
+               + list((pages_dir / ASSET_DIR).glob("site.*.css*")):
+        old.unlink()
+    remove_precompressed(pages_dir / "index.html")
+
+def index_page_name(n: int) -> str:
+    return "index.html" if n == 1 else f"index-{n}.html"
+
+_SEARCH_JS = """\
+<script>
+let idx=null;const q=document.getElementById('q'),res=document.getElementById('res'),list=document.getElementById('list');
+const esc=s=>s.replace(/[&<>"']/g,c=>({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[c]));
+q.addEventListener('input',async()=>{const s=q.value.trim().toLowerCase();
+if(!s){res.hidden=true;list.hidden=false;return}
+if(!idx)idx=await(await fetch('search-index.json')).json();
+const hit=idx.filter(r=>r[0].toLowerCase().includes(s)||r[1].toLowerCase().includes(s)).slice(0,100);
+res.innerHTML=hit.map(r=>`<li><a href="${encodeURIComponent(r[2])}.html">${esc(r[0])}</a> ${esc(r[1])}</li>`).join('')||'<li>ไม่พบรายการ</li>';
+res.hidden=false;list.hidden=true});
+</script>"""
+
+def write_paged_index(pages_dir, entries, css_href, per_page=PER_PAGE):
+    """entries: [(asset_id, name, slug)] ที่เรียงแล้ว → index.html, index-2.html, ... + search-index.json"""
+    pages_dir = Path(pages_dir)
+    n_pages = max(1, -(-len(entries) // per_page))
+    for old in pages_dir.glob("index-*.html*"):  # หน้าที่เกินจากรอบก่อน
+        m = re.fullmatch(r"index-(\d+)\.html(\.gz|\.br)?", old.name)
+        if m and int(m.group(1)) > n_pages:
+            old.unlink()
+
+    search = [[asset_id, name, slug] for asset_id, name, slug in entries]
+    write_text(pages_dir / "search-index.json",
+               json.dumps(search, ensure_ascii=False, separators=(",", ":")))
+
+    nav = " ".join(f"<a href='{index_page_name(i)}'>{i}</a>" for i in range(1, n_pages + 1))
+    for p in range(1, n_pages + 1):
+        chunk = entries[(p - 1) * per_page: p * per_page]
+        items = "".join(f"<li><a href='{slug}.html'>{html.escape(asset_id)}</a> {html.escape(name)}</li>"
+                        for asset_id, name, slug in chunk)
+        doc = (f"<!doctype html><html lang='th'><meta charset='utf-8'>"
+               f"<meta name='viewport' content='width=device-width, initial-scale=1'>"
+               f"<title>Smart Asset – Index ({p}/{n_pages})</title><link href='{css_href}' rel='stylesheet'>"
+               f"<div class='card'><div class='card-header'><h4 class='m-0'>Smart Asset – รายการหน้า</h4></div>"
+               f"<div class='card-body'><input id='q' class='form-control' placeholder='ค้นหา รหัส/ชื่อ' autocomplete='off'>"
+               f"<ol id='res' hidden></ol><div id='list'><ol start='{(p - 1) * per_page + 1}'>{items}</ol>"
+               f"<nav class='pager'>{nav}</nav></div></div></div>{_SEARCH_JS}</html>")
+        write_text(pages_dir / index_page_name(p), doc)
+    return n_pages
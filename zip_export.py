@@ -0,0 +1,31 @@
+# zip_export.py
+"""
+Streamed ZIP export used by the dashboard's bulk download.
+
+Files are added to the archive one at a time from an iterator (typically fed by
+qr_render.imap_ordered), so only the current file is held besides the archive.
+The archive itself is built in memory: the dashboard hands the finished bytes to
+st.download_button and keeps them in the JobRunner cache, so peak memory is
+about one archive (BytesIO.getvalue() returns the buffer without another copy).
+"""
+import io, zipfile
+# ไฟล์ที่บีบอัดมาแล้วเก็บแบบ STORED (deflate ซ้ำเสียเวลาเปล่า)
+_STORED = (".png", ".webp", ".pdf", ".gz", ".br", ".zip")
+
+def write_zip(files, zip_out):
+    """files: iterable ของ (ชื่อในไฟล์ zip, bytes หรือ str) → เขียนลง zip_out (path หรือ file-like)
+    คืนจำนวนไฟล์ที่เขียน
+    """
+    n = 0
+    with zipfile.ZipFile(zip_out, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for name, data in files:
+            method = zipfile.ZIP_STORED if name.lower().endswith(_STORED) else zipfile.ZIP_DEFLATED
+            zf.writestr(name, data, compress_type=method)
+            n += 1
+    return n
+
+def zip_bytes(files) -> bytes:
+    """write_zip ลงหน่วยความจำแล้วคืน bytes ของไฟล์ zip ที่เสร็จแล้ว"""
+    buf = io.BytesIO()
+    write_zip(files, buf)
+    return buf.getvalue()